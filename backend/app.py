@@ -1,15 +1,20 @@
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-import os, time, ffmpeg, requests, subprocess, sys
+import os, time, ffmpeg, subprocess, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "subtitles"))
+import http_client
+from audio_upload import upload_file, UploadError
 
 app = Flask(__name__)
 CORS(app)  # allow cross-origin requests from React
 app.config['UPLOAD_FOLDER'] = 'uploads'
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-ASSEMBLYAI_API_KEY = "2efd94d4c0594bcab804953a0e780ea8"
-ASSEMBLYAI_BASE_URL = "https://api.assemblyai.com"
+ASSEMBLYAI_BASE_URL = http_client.ASSEMBLYAI_BASE_URL
+if not http_client.ASSEMBLYAI_API_KEY:
+    print("WARNING: ASSEMBLYAI_API_KEY is not set; /upload-video will return an error until it is.")
 
 def extract_audio(video_path, audio_path):
     ffmpeg_path = r"C:\ffmpeg\ffmpeg-7.1.1-essentials_build\bin\ffmpeg.exe"  # <-- put your actual path here
@@ -21,19 +26,26 @@ def extract_audio(video_path, audio_path):
     )
 
 def transcribe(audio_path):
-    # Upload audio
-    with open(audio_path, "rb") as f:
-        r = requests.post(
+    try:
+        headers = http_client.assemblyai_headers()
+    except http_client.MissingAPIKeyError as e:
+        return f"Error: {e}"
+
+    # Upload audio (chunked, retried, reused if this audio was uploaded before)
+    try:
+        audio_url = upload_file(
+            audio_path,
             f"{ASSEMBLYAI_BASE_URL}/v2/upload",
-            headers={"authorization": ASSEMBLYAI_API_KEY},
-            data=f
+            headers,
+            cache_path=os.path.join(app.config['UPLOAD_FOLDER'], ".upload_cache.json")
         )
-    audio_url = r.json()['upload_url']
+    except UploadError as e:
+        return f"Error: {e}"
 
     # Start transcription
-    r2 = requests.post(
+    r2 = http_client.post(
         f"{ASSEMBLYAI_BASE_URL}/v2/transcript",
-        headers={"authorization": ASSEMBLYAI_API_KEY},
+        headers=headers,
         json={"audio_url": audio_url, "speech_model": "universal"}
     )
     transcript_id = r2.json()['id']
@@ -41,7 +53,7 @@ def transcribe(audio_path):
     # Poll for completion
     polling_endpoint = f"{ASSEMBLYAI_BASE_URL}/v2/transcript/{transcript_id}"
     while True:
-        result = requests.get(polling_endpoint, headers={"authorization": ASSEMBLYAI_API_KEY}).json()
+        result = http_client.get(polling_endpoint, headers=headers).json()
         if result['status'] == 'completed':
             return result['text']
         elif result['status'] == 'error':
@@ -81,6 +93,11 @@ def get_dubbed_video():
     video_filename = "MonsterDubs.mp4"  # change to your actual file name
     return send_from_directory(video_folder, video_filename)
 
+@app.route("/metrics/http")
+def http_metrics():
+    """Per-host latency of outgoing API calls made by this process"""
+    return jsonify(http_client.latency_summary())
+
 @app.route("/subtitles/")
 @app.route("/subtitles/<path:filename>")
 def serve_subtitles(filename=None):
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+audio_upload.py - Resilient upload of large audio files to AssemblyAI
+
+Streams the file in fixed-size chunks with progress reporting, retries
+failed uploads with exponential backoff and caches the returned upload_url
+per content hash so an interrupted or repeated job does not upload again.
+
+Run directly to check the retry, backoff and cache behaviour against a
+local stub server that injects failures:
+    python audio_upload.py
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import requests
+
+import http_client
+
+# ----------------- CONFIG -----------------
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024   # bytes sent per chunk (5 MB)
+UPLOAD_RETRIES = 4                     # extra attempts after the first failure
+UPLOAD_BACKOFF = 2                     # seconds, doubled after every failed attempt
+UPLOAD_TIMEOUT = (10, 300)             # (connect, read) timeout in seconds
+UPLOAD_CACHE_FILE = ".upload_cache.json"
+UPLOAD_CACHE_TTL = 23 * 3600           # AssemblyAI keeps uploads for ~24h
+
+class UploadError(Exception):
+    """Raised when the audio could not be uploaded after all retries."""
+
+# ----------------- HELPERS -----------------
+def file_sha256(path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Hash the file contents so identical audio maps to the same cache entry."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_upload_cache(cache_path=UPLOAD_CACHE_FILE):
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_upload_cache(cache, cache_path=UPLOAD_CACHE_FILE):
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=4)
+    os.replace(tmp_path, cache_path)
+
+def get_cached_upload_url(content_hash, cache_path=UPLOAD_CACHE_FILE, ttl=UPLOAD_CACHE_TTL):
+    """Return a still-valid upload_url for this content hash, or None."""
+    entry = load_upload_cache(cache_path).get(content_hash)
+    if not entry:
+        return None
+    if time.time() - entry.get("uploaded_at", 0) > ttl:
+        return None
+    return entry.get("upload_url")
+
+def store_upload_url(content_hash, upload_url, cache_path=UPLOAD_CACHE_FILE):
+    cache = load_upload_cache(cache_path)
+    cache[content_hash] = {"upload_url": upload_url, "uploaded_at": time.time()}
+    save_upload_cache(cache, cache_path)
+
+def iter_file_chunks(path, chunk_size=UPLOAD_CHUNK_SIZE, show_progress=True):
+    """
+    Yield the file in fixed-size chunks, printing progress as they are sent.
+    Passing a generator as the request body makes requests use chunked transfer.
+    """
+    total = os.path.getsize(path)
+    sent = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            sent += len(block)
+            if show_progress:
+                pct = (sent / total * 100) if total else 100.0
+                sys.stdout.write(f"\r  Uploaded {sent / 1048576:.1f}/{total / 1048576:.1f} MB ({pct:.0f}%)")
+                sys.stdout.flush()
+            yield block
+    if show_progress:
+        sys.stdout.write("\n")
+
+# ----------------- UPLOAD -----------------
+def upload_file(path, upload_endpoint, headers,
+                chunk_size=UPLOAD_CHUNK_SIZE, retries=UPLOAD_RETRIES, backoff=UPLOAD_BACKOFF,
+                timeout=UPLOAD_TIMEOUT, cache_path=UPLOAD_CACHE_FILE, show_progress=True):
+    """
+    Upload 'path' to 'upload_endpoint' and return the upload_url.
+
+    A cached upload_url is reused when the same content was uploaded recently.
+    The AssemblyAI upload endpoint has no byte-range resume, so a failed attempt
+    re-sends the file; retries back off exponentially and only the final
+    failure raises UploadError.
+    """
+    if not os.path.exists(path):
+        raise UploadError(f"Audio file not found for upload: {path}")
+
+    content_hash = file_sha256(path, chunk_size)
+    cached = get_cached_upload_url(content_hash, cache_path) if cache_path else None
+    if cached:
+        print("Reusing cached upload for identical audio:", cached)
+        return cached
+
+    delay = backoff
+    last_error = None
+    for attempt in range(1, retries + 2):
+        try:
+            r = http_client.post(upload_endpoint, headers=headers,
+                                 data=iter_file_chunks(path, chunk_size, show_progress),
+                                 timeout=timeout)
+            r.raise_for_status()
+            try:
+                upload_url = r.json().get("upload_url")
+            except ValueError:
+                # The upload went through; re-sending the file will not fix the response
+                raise UploadError(f"Upload response was not valid JSON: {r.text[:200]}")
+            if not upload_url:
+                raise UploadError(f"Upload response did not contain upload_url: {r.text}")
+            if cache_path:
+                store_upload_url(content_hash, upload_url, cache_path)
+            return upload_url
+        except UploadError:
+            raise
+        except requests.RequestException as e:
+            last_error = e
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            # 4xx other than 408/429 will not succeed on a retry
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                break
+            if attempt > retries:
+                break
+            print(f"\nUpload attempt {attempt} failed ({e}). Retrying in {delay}s...")
+            time.sleep(delay)
+            delay *= 2
+
+    message = f"Error uploading audio: {last_error}"
+    response = getattr(last_error, "response", None)
+    if response is not None:
+        message += f"\nResponse: {response.text}"
+    raise UploadError(message)
+
+# ----------------- SELF-CHECK -----------------
+def _start_stub_server(responses):
+    """
+    Local upload endpoint answering POSTs from 'responses', a list of
+    (status, body) pairs consumed in order. Returns (server, received) where
+    received collects the size of every uploaded body.
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    received = []
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _read_body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            body = b""
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return body
+                body += self.rfile.read(size)
+                self.rfile.readline()
+
+        def do_POST(self):
+            received.append(len(self._read_body()))
+            status, body = responses.pop(0)
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+def main():
+    import tempfile
+    ok = json.dumps({"upload_url": "https://cdn.example/upload/abc"})
+    unavailable = (503, json.dumps({"error": "Service unavailable"}))
+
+    sleeps = []
+    real_sleep = time.sleep
+    time.sleep = sleeps.append          # record the backoff instead of waiting for it
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            audio = os.path.join(tmp, "audio.mp3")
+            with open(audio, "wb") as f:
+                f.write(os.urandom(300 * 1024))
+            cache = os.path.join(tmp, "upload_cache.json")
+            kwargs = dict(headers={}, chunk_size=64 * 1024, backoff=1, cache_path=cache, show_progress=False)
+
+            # Two 503s, then success: 3 attempts, backoff 1s then 2s, whole file sent every time
+            server, received = _start_stub_server([unavailable, unavailable, (200, ok)])
+            endpoint = f"http://127.0.0.1:{server.server_address[1]}/v2/upload"
+            assert upload_file(audio, endpoint, **kwargs) == "https://cdn.example/upload/abc"
+            assert received == [300 * 1024] * 3, received
+            assert sleeps == [1, 2], sleeps
+
+            # Same content again: served from the cache, no request
+            assert upload_file(audio, endpoint, **kwargs) == "https://cdn.example/upload/abc"
+            assert len(received) == 3, received
+            server.shutdown()
+
+            # 4xx fails fast and a non-JSON 200 is not retried
+            os.remove(cache)
+            for response in ((401, json.dumps({"error": "Authentication error"})), (200, "<html>oops</html>")):
+                server, received = _start_stub_server([response])
+                endpoint = f"http://127.0.0.1:{server.server_address[1]}/v2/upload"
+                del sleeps[:]
+                try:
+                    upload_file(audio, endpoint, **kwargs)
+                    raise AssertionError(f"upload_file did not raise for {response}")
+                except UploadError:
+                    pass
+                assert len(received) == 1 and not sleeps, (response, received, sleeps)
+                assert not os.path.exists(cache)
+                server.shutdown()
+    finally:
+        time.sleep = real_sleep
+    print("audio_upload: retry, backoff, cache and fail-fast checks passed")
+
+if __name__ == "__main__":
+    main()
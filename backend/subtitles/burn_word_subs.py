@@ -10,11 +10,19 @@ import time
 import requests
 import subprocess
 import ffmpeg
-import json
+import itertools
+import tempfile
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from transformers import pipeline
 import torch
 
+import http_client
+import lexicon
+from audio_upload import upload_file, UploadError
+from subtitle_grouping import iter_chunks, SrtWriter, JsonArrayWriter
+from emotion_context import iter_classified_chunks, reset_stats as reset_emotion_stats, stats as emotion_stats
+from transcript_stream import iter_text, iter_file_text, iter_items, read_fields, READ_CHUNK, TranscriptStreamError
+
 # ----------------- CONFIG -----------------
 # Lightweight emotion model (only ~50MB)
 EMOTION_MODEL = "bhadresh-savani/distilbert-base-uncased-emotion"
@@ -48,14 +56,13 @@ EMOTION_EMOJIS = {
     'neutral': '😐'
 }
 
-# Either set ASSEMBLYAI_API_KEY in the environment OR paste it here
-
-API_KEY = os.environ.get("ASSEMBLYAI_API_KEY") or "2efd94d4c0594bcab804953a0e780ea8"
+# Set ASSEMBLYAI_API_KEY in the environment (see http_client.py)
+API_KEY = http_client.ASSEMBLYAI_API_KEY
 if not API_KEY:
-    print("WARNING: No AssemblyAI API key provided. Set ASSEMBLYAI_API_KEY env var or paste key in script.")
+    print("WARNING: No AssemblyAI API key provided. Set the ASSEMBLYAI_API_KEY environment variable.")
 
 # Base URL
-BASE = "https://api.assemblyai.com/v2"
+BASE = f"{http_client.ASSEMBLYAI_BASE_URL}/v2"
 
 # Files
 INPUT_VIDEO = "MonsterInc.mp4"
@@ -94,9 +101,17 @@ def detect_emotion_lightweight(text):
     return 'neutral'
 
 def get_word_definition(word):
-    """Fetches a definition and example from a free dictionary API."""
+    """
+    Looks up a definition and example in the local lexicon index (see lexicon.py).
+    Falls back to the free dictionary API only when no index has been built.
+    """
+    if lexicon.is_available():
+        entry = lexicon.lookup(word)
+        if entry:
+            return entry
+        return {"definition": "Definition not found.", "example": "Example not found."}
     try:
-        response = requests.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}")
+        response = http_client.get(f"{http_client.DICTIONARY_BASE_URL}/{word}")
         response.raise_for_status()
         data = response.json()
         if isinstance(data, list) and data:
@@ -143,27 +158,16 @@ def extract_audio(video_path, audio_out):
         sys.exit(1)
 
 def upload_audio_to_assemblyai(audio_path, api_key):
-    """Upload binary file to AssemblyAI /upload endpoint and return upload_url."""
+    """Upload binary file to AssemblyAI /upload endpoint (chunked, retried, cached) and return upload_url."""
     print(f"[2/6] Uploading audio '{audio_path}' to AssemblyAI...")
     headers = {"authorization": api_key}
     try:
-        with open(audio_path, "rb") as f:
-            r = requests.post(f"{BASE}/upload", headers=headers, data=f)
-        r.raise_for_status()
-        upload_url = r.json().get("upload_url")
-        if not upload_url:
-            print("Upload response did not contain upload_url:", r.text)
-            sys.exit(1)
-        print("Upload successful. audio_url:", upload_url)
-        return upload_url
-    except FileNotFoundError:
-        print("Audio file not found for upload.")
-        sys.exit(1)
-    except requests.RequestException as e:
-        print("Error uploading audio:", e)
-        if hasattr(e, "response") and e.response is not None:
-            print("Response:", e.response.text)
+        upload_url = upload_file(audio_path, f"{BASE}/upload", headers)
+    except UploadError as e:
+        print(e)
         sys.exit(1)
+    print("Upload successful. audio_url:", upload_url)
+    return upload_url
 
 def request_transcript(api_key, audio_url):
     """
@@ -179,7 +183,7 @@ def request_transcript(api_key, audio_url):
         "disfluencies": False
     }
     try:
-        r = requests.post(f"{BASE}/transcript", json=payload, headers=headers)
+        r = http_client.post(f"{BASE}/transcript", json=payload, headers=headers)
         r.raise_for_status()
         tid = r.json().get("id")
         if not tid:
@@ -193,31 +197,67 @@ def request_transcript(api_key, audio_url):
             print("Response:", e.response.text)
         sys.exit(1)
 
-def poll_transcript(api_key, transcript_id, poll_interval=POLL_INTERVAL):
-    """Polls until transcription status is 'completed' (returns JSON) or 'error' (raises)."""
+def _tee_blocks(blocks, f):
+    """Yield byte blocks unchanged while writing each one to the open file f."""
+    for block in blocks:
+        f.write(block)
+        yield block
+
+def poll_transcript(api_key, transcript_id, dest_path, poll_interval=POLL_INTERVAL):
+    """
+    Polls until transcription status is 'completed' or 'error' (exits).
+    Only the status field is parsed from each response, but every body is
+    copied to dest_path as it is read and then read to the end. The final
+    poll therefore leaves the completed transcript spooled on disk (one
+    download, never loaded into memory) and the keep-alive connection goes
+    back to the pool. The words are then streamed by iter_transcript_words.
+    """
     print("[4/6] Polling transcription status...")
     headers = {"authorization": api_key}
     url = f"{BASE}/transcript/{transcript_id}"
     while True:
         try:
-            r = requests.get(url, headers=headers)
-            r.raise_for_status()
-            j = r.json()
-        except requests.RequestException as e:
+            with http_client.get(url, headers=headers, stream=True) as r:
+                r.raise_for_status()
+                with open(dest_path, "wb") as spool:
+                    blocks = _tee_blocks(r.iter_content(READ_CHUNK), spool)
+                    status = read_fields(iter_text(blocks), ("status",)).get("status")
+                    for _ in blocks:
+                        pass
+            if status == "error":
+                # Failed transcripts carry no words, the spooled body is small
+                print("Transcription error:", read_fields(iter_file_text(dest_path), ("error",)).get("error"))
+                sys.exit(1)
+        except (requests.RequestException, TranscriptStreamError) as e:
             print("Error polling transcription:", e)
             sys.exit(1)
 
-        status = j.get("status")
         if status == "completed":
             print("Transcription completed.")
-            return j
-        if status == "error":
-            print("Transcription error:", j.get("error"))
-            sys.exit(1)
+            return dest_path
 
         print(f"Status: {status}. Waiting {poll_interval}s...")
         time.sleep(poll_interval)
 
+def iter_transcript_words(transcript_path):
+    """
+    Stream the words (dicts with text,start,end) of the transcript spooled
+    by poll_transcript one at a time. Falls back to the words of the
+    utterances when the top-level list is empty, like
+    extract_word_list_from_result.
+    """
+    for path in (("words", "*"), ("utterances", "*", "words", "*")):
+        found = False
+        try:
+            for word in iter_items(iter_file_text(transcript_path), path):
+                found = True
+                yield word
+        except TranscriptStreamError as e:
+            print("Error reading transcript words:", e)
+            sys.exit(1)
+        if found:
+            return
+
 def extract_word_list_from_result(result_json):
     """
     Extract a flat list of words (dicts with text,start,end) from AssemblyAI result.
@@ -236,63 +276,37 @@ def extract_word_list_from_result(result_json):
             return all_words
     return []
 
-def ms_to_srt_time(ms):
-    """Convert milliseconds to SRT timestamp 'HH:MM:SS,mmm'"""
-    ms = int(ms)
-    hours = ms // 3600000
-    rem = ms % 3600000
-    minutes = rem // 60000
-    rem = rem % 60000
-    seconds = rem // 1000
-    millis = rem % 1000
-    return f"{hours:02}:{minutes:02}:{seconds:02},{millis:03}"
-
 def words_to_grouped_srt_and_json(words, srt_path, json_path, max_chunk_ms=MAX_CHUNK_MS, max_chars=MAX_CHARS, pad_ms=PAD_MS):
     """
-    Modified to generate both SRT and JSON files with emotion detection
+    Modified to generate both SRT and JSON files with emotion detection.
+    Chunk boundaries come from the vectorized engine in subtitle_grouping.py,
+    emotions from the context-window classifier in emotion_context.py.
+    'words' may be any iterable (e.g. iter_transcript_words): chunks are
+    processed as they arrive and both files are written incrementally.
     """
     print(f"[5/6] Building emotion-color-coded SRT -> '{srt_path}' and JSON -> '{json_path}' ...")
-    lines = []
-    json_data = []
-    cur_words = []
-    cur_start = None
-    cur_end = None
-    cur_chars = 0
-
-    for w in words:
-        text = w.get("text") or ""
-        try:
-            start = int(float(w.get("start")))
-            end = int(float(w.get("end")))
-        except Exception:
-            continue
-
-        if cur_start is None:
-            cur_start = start
-            cur_end = end
-            cur_words = [text]
-            cur_chars = len(text)
-            continue
-
-        prospective_chars = cur_chars + 1 + len(text)
-        prospective_dur = end - cur_start
-
-        if (prospective_dur > max_chunk_ms) or (prospective_chars > max_chars):
-            # Process current chunk
-            full_text = " ".join(cur_words)
-            emotion = detect_emotion_lightweight(full_text)
+    reset_emotion_stats()
+    first_start = last_end = None
+
+    # Batched passes over overlapping context windows instead of a model call per chunk
+    chunks = iter_classified_chunks(iter_chunks(words, max_chunk_ms, max_chars), emotion_classifier)
+    with SrtWriter(srt_path) as srt, JsonArrayWriter(json_path) as json_out:
+        for (cur_start, cur_end, cur_words), full_text, emotion in chunks:
+            if first_start is None:
+                first_start = cur_start
+            last_end = cur_end
             color = EMOTION_COLORS.get(emotion, 'ffffff')
             emoji = EMOTION_EMOJIS.get(emotion, '')
-            
+
             # Format with color and emoji for SRT
             colored_text = f'<font color="#{color}">{emoji} {full_text}</font>'
-            lines.append((cur_start, cur_end + pad_ms, colored_text))
-            
+            srt.write(cur_start, cur_end + pad_ms, colored_text)
+
             # Add individual words to JSON with emotion and definitions
             for word_text in cur_words:
                 clean_word = word_text.strip('.,?!').lower()
                 definition_data = get_word_definition(clean_word)
-                
+
                 json_entry = {
                     "start": cur_start,
                     "end": cur_end + pad_ms,
@@ -301,54 +315,12 @@ def words_to_grouped_srt_and_json(words, srt_path, json_path, max_chunk_ms=MAX_C
                     "definition": definition_data["definition"],
                     "example": definition_data["example"]
                 }
-                json_data.append(json_entry)
-            
-            # Start new chunk
-            cur_words = [text]
-            cur_start = start
-            cur_end = end
-            cur_chars = len(text)
-        else:
-            cur_words.append(text)
-            cur_end = end
-            cur_chars = prospective_chars
-
-    if cur_words:
-        full_text = " ".join(cur_words)
-        emotion = detect_emotion_lightweight(full_text)
-        color = EMOTION_COLORS.get(emotion, 'ffffff')
-        emoji = EMOTION_EMOJIS.get(emotion, '')
-        colored_text = f'<font color="#{color}">{emoji} {full_text}</font>'
-        lines.append((cur_start, cur_end + pad_ms, colored_text))
-        
-        # Add final words to JSON
-        for word_text in cur_words:
-            clean_word = word_text.strip('.,?!').lower()
-            definition_data = get_word_definition(clean_word)
-            
-            json_entry = {
-                "start": cur_start,
-                "end": cur_end + pad_ms,
-                "text": word_text,
-                "emotion": emotion,
-                "definition": definition_data["definition"],
-                "example": definition_data["example"]
-            }
-            json_data.append(json_entry)
-
-    # Write SRT file
-    with open(srt_path, "w", encoding="utf-8") as f:
-        for i, (st, en, text) in enumerate(lines, start=1):
-            if en <= st:
-                en = st + 20
-            f.write(f"{i}\n")
-            f.write(f"{ms_to_srt_time(st)} --> {ms_to_srt_time(en)}\n")
-            f.write(text.strip() + "\n\n")
-    
-    # Write JSON file for web app
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(json_data, f, indent=4)
-    
+                json_out.write(json_entry)
+
+    if emotion_classifier and first_start is not None:
+        minutes = max(1.0, last_end - first_start) / 60000
+        print(f"Emotion model: {emotion_stats['batches']} batched calls for {emotion_stats['texts']} context windows "
+              f"({emotion_stats['batches'] / minutes:.1f} calls per minute of video, {emotion_stats['seconds']:.1f}s)")
     print("Emotion-color-coded SRT file written:", srt_path)
     print("Interactive JSON file written:", json_path)
     return srt_path
@@ -361,7 +333,7 @@ def fallback_get_srt_from_assemblyai(api_key, transcript_id, srt_path):
     headers = {"authorization": api_key}
     url = f"{BASE}/transcript/{transcript_id}/srt"
     try:
-        r = requests.get(url, headers=headers)
+        r = http_client.get(url, headers=headers)
         r.raise_for_status()
         with open(srt_path, "w", encoding="utf-8") as f:
             f.write(r.text)
@@ -398,7 +370,7 @@ def main():
     # basic checks
     ensure_file_exists(INPUT_VIDEO)
     if not API_KEY:
-        print("ERROR: No AssemblyAI API key found. Set ASSEMBLYAI_API_KEY env var or update API_KEY in script.")
+        print("ERROR: No AssemblyAI API key found. Set the ASSEMBLYAI_API_KEY environment variable.")
         sys.exit(1)
 
     # 1. Extract audio
@@ -410,25 +382,34 @@ def main():
     # 3. Request transcription
     transcript_id = request_transcript(API_KEY, audio_url)
 
-    # 4. Poll until transcription done
-    result = poll_transcript(API_KEY, transcript_id)
-
-    # 5. Try to extract words
-    words = extract_word_list_from_result(result)
-    if not words:
-        print("No per-word timestamps found in transcription JSON.")
-        # fallback: try download srt directly from assemblyai
-        downloaded = fallback_get_srt_from_assemblyai(API_KEY, transcript_id, SRT_FILE)
-        if not downloaded:
-            print("No SRT available from AssemblyAI and no words present. Exiting.")
-            sys.exit(1)
-    else:
-        # build grouped srt and json
-        words_to_grouped_srt_and_json(words, SRT_FILE, JSON_OUTPUT)
+    fd, transcript_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        # 4. Poll until transcription done (the completed response is spooled to transcript_path)
+        poll_transcript(API_KEY, transcript_id, transcript_path)
+
+        # 5. Try to extract words (streamed from the spooled file, never held in memory all at once)
+        words = iter_transcript_words(transcript_path)
+        first_word = next(words, None)
+        if first_word is None:
+            print("No per-word timestamps found in transcription JSON.")
+            # fallback: try download srt directly from assemblyai
+            downloaded = fallback_get_srt_from_assemblyai(API_KEY, transcript_id, SRT_FILE)
+            if not downloaded:
+                print("No SRT available from AssemblyAI and no words present. Exiting.")
+                sys.exit(1)
+        else:
+            # build grouped srt and json
+            words_to_grouped_srt_and_json(itertools.chain([first_word], words), SRT_FILE, JSON_OUTPUT)
+    finally:
+        os.remove(transcript_path)
 
     # 6. Burn SRT into video
     burn_srt_into_video(INPUT_VIDEO, SRT_FILE, OUTPUT_VIDEO)
 
+    print("\nHTTP request latency:")
+    http_client.print_latency_summary()
+
     print("\nAll done! 🎉")
     print("Generated:", OUTPUT_VIDEO)
     print("Generated:", JSON_OUTPUT, "(for web app)")
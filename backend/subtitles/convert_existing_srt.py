@@ -7,6 +7,8 @@ import re
 import json
 import os
 
+import lexicon
+
 def parse_srt_time(time_str):
     """Convert SRT time format to milliseconds"""
     # Format: HH:MM:SS,mmm
@@ -44,51 +46,55 @@ def detect_emotion_simple(text):
     else:
         return 'neutral'
 
+# Fallback definitions used when no lexicon index has been built (see lexicon.py)
+SIMPLE_DEFINITIONS = {
+    'hey': {'definition': 'Used to attract attention or express greeting', 'example': 'Hey, how are you doing?'},
+    'look': {'definition': 'To direct one\'s gaze toward someone or something', 'example': 'Look at that beautiful sunset!'},
+    'who': {'definition': 'What or which person or people', 'example': 'Who is coming to the party?'},
+    'back': {'definition': 'Returning to a previous position or state', 'example': 'I\'ll be back in five minutes.'},
+    'how': {'definition': 'In what way or manner', 'example': 'How did you do that?'},
+    'was': {'definition': 'Past tense of \'be\'', 'example': 'It was a great day.'},
+    'your': {'definition': 'Belonging to you', 'example': 'Is this your book?'},
+    'vacation': {'definition': 'A period of time devoted to pleasure, rest, or relaxation', 'example': 'We went on vacation to Hawaii.'},
+    'it': {'definition': 'Referring to a thing previously mentioned', 'example': 'It was raining yesterday.'},
+    'amazing': {'definition': 'Causing great surprise or wonder', 'example': 'That magic trick was amazing!'},
+    'i': {'definition': 'First person singular pronoun', 'example': 'I am going to the store.'},
+    'went': {'definition': 'Past tense of \'go\'', 'example': 'I went to the movies yesterday.'},
+    'to': {'definition': 'Expressing motion in the direction of', 'example': 'I\'m going to the store.'},
+    'the': {'definition': 'Definite article', 'example': 'The cat is sleeping.'},
+    'beach': {'definition': 'A pebbly or sandy shore, especially by the ocean', 'example': 'The children played on the beach.'},
+    'did': {'definition': 'Past tense of \'do\'', 'example': 'Did you finish your homework?'},
+    'you': {'definition': 'Second person pronoun', 'example': 'You are my best friend.'},
+    'bring': {'definition': 'To carry or convey something to a place', 'example': 'Don\'t forget to bring your umbrella.'},
+    'me': {'definition': 'First person object pronoun', 'example': 'Can you help me?'},
+    'anything': {'definition': 'Any object, occurrence, or matter whatever', 'example': 'Do you need anything?'},
+    'of': {'definition': 'Expressing the relationship between a part and a whole', 'example': 'A piece of cake.'},
+    'course': {'definition': 'A series of lessons or lectures on a particular subject', 'example': 'I\'m taking a course in mathematics.'},
+    'here': {'definition': 'In or at this place', 'example': 'Come here, I want to show you something.'},
+    'a': {'definition': 'Indefinite article', 'example': 'A cat is sleeping.'},
+    'seashell': {'definition': 'The shell of a marine mollusk', 'example': 'She collected colorful seashells on the shore.'},
+    'wow': {'definition': 'Used to express astonishment or admiration', 'example': 'Wow, that\'s amazing!'},
+    'beautiful': {'definition': 'Pleasing the senses or mind aesthetically', 'example': 'What a beautiful flower!'},
+    'glad': {'definition': 'Feeling pleasure or happiness', 'example': 'I\'m glad you could make it to the party.'},
+    'like': {'definition': 'To find agreeable, enjoyable, or satisfactory', 'example': 'I like chocolate ice cream.'},
+    'let': {'definition': 'To allow or permit', 'example': 'Let me help you with that.'},
+    'go': {'definition': 'To move from one place to another', 'example': 'Let\'s go to the movies.'},
+    'work': {'definition': 'Activity involving mental or physical effort', 'example': 'I have a lot of work to do today.'},
+    'now': {'definition': 'At the present time or moment', 'example': 'I\'m busy now.'},
+    'ready': {'definition': 'Fully prepared or in fit condition', 'example': 'Are you ready to go?'},
+    'for': {'definition': 'In support of or in favor of', 'example': 'I\'m voting for that candidate.'},
+    'another': {'definition': 'One more of the same kind', 'example': 'I need another cup of coffee.'},
+    'day': {'definition': 'A period of 24 hours', 'example': 'Have a great day!'}
+}
+
 def get_word_definition(word):
-    """Simple word definitions"""
-    definitions = {
-        'hey': {'definition': 'Used to attract attention or express greeting', 'example': 'Hey, how are you doing?'},
-        'look': {'definition': 'To direct one\'s gaze toward someone or something', 'example': 'Look at that beautiful sunset!'},
-        'who': {'definition': 'What or which person or people', 'example': 'Who is coming to the party?'},
-        'back': {'definition': 'Returning to a previous position or state', 'example': 'I\'ll be back in five minutes.'},
-        'how': {'definition': 'In what way or manner', 'example': 'How did you do that?'},
-        'was': {'definition': 'Past tense of \'be\'', 'example': 'It was a great day.'},
-        'your': {'definition': 'Belonging to you', 'example': 'Is this your book?'},
-        'vacation': {'definition': 'A period of time devoted to pleasure, rest, or relaxation', 'example': 'We went on vacation to Hawaii.'},
-        'it': {'definition': 'Referring to a thing previously mentioned', 'example': 'It was raining yesterday.'},
-        'amazing': {'definition': 'Causing great surprise or wonder', 'example': 'That magic trick was amazing!'},
-        'i': {'definition': 'First person singular pronoun', 'example': 'I am going to the store.'},
-        'went': {'definition': 'Past tense of \'go\'', 'example': 'I went to the movies yesterday.'},
-        'to': {'definition': 'Expressing motion in the direction of', 'example': 'I\'m going to the store.'},
-        'the': {'definition': 'Definite article', 'example': 'The cat is sleeping.'},
-        'beach': {'definition': 'A pebbly or sandy shore, especially by the ocean', 'example': 'The children played on the beach.'},
-        'did': {'definition': 'Past tense of \'do\'', 'example': 'Did you finish your homework?'},
-        'you': {'definition': 'Second person pronoun', 'example': 'You are my best friend.'},
-        'bring': {'definition': 'To carry or convey something to a place', 'example': 'Don\'t forget to bring your umbrella.'},
-        'me': {'definition': 'First person object pronoun', 'example': 'Can you help me?'},
-        'anything': {'definition': 'Any object, occurrence, or matter whatever', 'example': 'Do you need anything?'},
-        'of': {'definition': 'Expressing the relationship between a part and a whole', 'example': 'A piece of cake.'},
-        'course': {'definition': 'A series of lessons or lectures on a particular subject', 'example': 'I\'m taking a course in mathematics.'},
-        'here': {'definition': 'In or at this place', 'example': 'Come here, I want to show you something.'},
-        'a': {'definition': 'Indefinite article', 'example': 'A cat is sleeping.'},
-        'seashell': {'definition': 'The shell of a marine mollusk', 'example': 'She collected colorful seashells on the shore.'},
-        'wow': {'definition': 'Used to express astonishment or admiration', 'example': 'Wow, that\'s amazing!'},
-        'beautiful': {'definition': 'Pleasing the senses or mind aesthetically', 'example': 'What a beautiful flower!'},
-        'glad': {'definition': 'Feeling pleasure or happiness', 'example': 'I\'m glad you could make it to the party.'},
-        'like': {'definition': 'To find agreeable, enjoyable, or satisfactory', 'example': 'I like chocolate ice cream.'},
-        'let': {'definition': 'To allow or permit', 'example': 'Let me help you with that.'},
-        'go': {'definition': 'To move from one place to another', 'example': 'Let\'s go to the movies.'},
-        'work': {'definition': 'Activity involving mental or physical effort', 'example': 'I have a lot of work to do today.'},
-        'now': {'definition': 'At the present time or moment', 'example': 'I\'m busy now.'},
-        'ready': {'definition': 'Fully prepared or in fit condition', 'example': 'Are you ready to go?'},
-        'for': {'definition': 'In support of or in favor of', 'example': 'I\'m voting for that candidate.'},
-        'another': {'definition': 'One more of the same kind', 'example': 'I need another cup of coffee.'},
-        'day': {'definition': 'A period of 24 hours', 'example': 'Have a great day!'}
-    }
-    
+    """Word definitions from the local lexicon index, then the built-in list"""
     clean_word = word.lower().strip('.,?!')
-    if clean_word in definitions:
-        return definitions[clean_word]
+    entry = lexicon.lookup(clean_word)
+    if entry:
+        return entry
+    if clean_word in SIMPLE_DEFINITIONS:
+        return SIMPLE_DEFINITIONS[clean_word]
     else:
         return {
             'definition': f'A word meaning {clean_word}',
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+emotion_context.py - Scene-level emotion classification with temporal smoothing
+
+Instead of classifying every ~45-character subtitle chunk on its own, chunks
+are split into scenes at long pauses, each scene is covered by overlapping
+windows of several chunks, and the windows are classified in batches. Every
+chunk gets the average score distribution of the windows that contain it,
+the scores are smoothed over time and a label only changes when the new
+emotion clearly wins, so colors stop flickering from line to line.
+
+Run directly to compare model calls per minute of video against the
+per-chunk approach:
+    python emotion_context.py [transcript.json]
+"""
+
+import sys
+import json
+import time
+
+# ----------------- CONFIG -----------------
+CONTEXT_CHUNKS = 5       # chunks per context window
+CONTEXT_STRIDE = 3       # chunks between the starts of consecutive windows
+SCENE_GAP_MS = 4000      # a pause this long starts a new scene (windows never cross it)
+BATCH_SIZE = 16          # windows per forward pass
+SMOOTHING = 0.5          # weight of the neighbouring chunk in the forward/backward average
+HYSTERESIS = 0.1         # score lead the new emotion needs before the label switches
+SEGMENT_CHUNKS = 512     # most chunks held at once when classifying a stream
+
+# Model usage counters, read by the benchmark and burn_word_subs' summary
+stats = {"batches": 0, "texts": 0, "seconds": 0.0}
+
+def reset_stats():
+    stats.update(batches=0, texts=0, seconds=0.0)
+
+# ----------------- HELPERS -----------------
+def split_scenes(starts, ends, gap_ms=SCENE_GAP_MS):
+    """Return (first, last_exclusive) chunk ranges separated by pauses longer than gap_ms."""
+    scenes = []
+    first = 0
+    for i in range(1, len(starts)):
+        if starts[i] - ends[i - 1] > gap_ms:
+            scenes.append((first, i))
+            first = i
+    if starts:
+        scenes.append((first, len(starts)))
+    return scenes
+
+def build_windows(texts, scenes, size=CONTEXT_CHUNKS, stride=CONTEXT_STRIDE):
+    """Return (first, last_exclusive) chunk ranges of the context windows inside each scene."""
+    windows = []
+    for first, last in scenes:
+        i = first
+        while True:
+            end = min(i + size, last)
+            if any(any(c.isalpha() for c in t) for t in texts[i:end]):
+                windows.append((i, end))
+            if end >= last:
+                break
+            i += stride
+    return windows
+
+def _score_dicts(classifier, window_texts, batch_size):
+    """Run the classifier over all window texts in batches; returns one {label: score} per text."""
+    scores = []
+    for b in range(0, len(window_texts), batch_size):
+        batch = window_texts[b:b + batch_size]
+        started = time.perf_counter()
+        results = classifier(batch, truncation=True, max_length=512, top_k=None)
+        stats["seconds"] += time.perf_counter() - started
+        stats["batches"] += 1
+        stats["texts"] += len(batch)
+        for result in results:
+            if isinstance(result, dict):        # single-label output shape
+                result = [result]
+            scores.append({r["label"].lower(): r["score"] for r in result})
+    return scores
+
+def _smooth(chunk_scores, scenes, alpha=SMOOTHING):
+    """Forward and backward exponential smoothing within each scene, averaged (no lag)."""
+    smoothed = [dict(s) if s else None for s in chunk_scores]
+    for first, last in scenes:
+        idx = [i for i in range(first, last) if chunk_scores[i]]
+        if len(idx) < 2:
+            continue
+        labels = set().union(*(chunk_scores[i].keys() for i in idx))
+        forward, backward = {}, {}
+        prev = None
+        for i in idx:
+            prev = {l: chunk_scores[i].get(l, 0.0) if prev is None else
+                    (1 - alpha) * chunk_scores[i].get(l, 0.0) + alpha * prev[l] for l in labels}
+            forward[i] = prev
+        prev = None
+        for i in reversed(idx):
+            prev = {l: chunk_scores[i].get(l, 0.0) if prev is None else
+                    (1 - alpha) * chunk_scores[i].get(l, 0.0) + alpha * prev[l] for l in labels}
+            backward[i] = prev
+        for i in idx:
+            smoothed[i] = {l: (forward[i][l] + backward[i][l]) / 2 for l in labels}
+    return smoothed
+
+def _labels_with_hysteresis(smoothed, scenes, margin=HYSTERESIS):
+    labels = ['neutral'] * len(smoothed)
+    for first, last in scenes:
+        current = None
+        for i in range(first, last):
+            scores = smoothed[i]
+            if not scores:
+                labels[i] = current or 'neutral'
+                continue
+            best = max(scores, key=scores.get)
+            if current is None or current not in scores or scores[best] - scores[current] > margin:
+                current = best
+            labels[i] = current
+    return labels
+
+# ----------------- CLASSIFICATION -----------------
+def classify_chunks(texts, starts, ends, classifier, context_chunks=CONTEXT_CHUNKS,
+                    stride=CONTEXT_STRIDE, batch_size=BATCH_SIZE):
+    """
+    Return one emotion label per subtitle chunk.
+    texts, starts and ends describe the chunks in time order (times in ms).
+    Falls back to 'neutral' for every chunk if there is no classifier or inference fails.
+    """
+    if not classifier or not texts:
+        return ['neutral'] * len(texts)
+
+    scenes = split_scenes(starts, ends)
+    windows = build_windows(texts, scenes, context_chunks, stride)
+    try:
+        window_scores = _score_dicts(classifier, [" ".join(texts[a:b]) for a, b in windows], batch_size)
+    except Exception as e:
+        print(f"Emotion detection error: {str(e)[:100]}...")
+        return ['neutral'] * len(texts)
+
+    # Each chunk gets the mean distribution of the windows covering it
+    sums = [None] * len(texts)
+    counts = [0] * len(texts)
+    for (a, b), scores in zip(windows, window_scores):
+        for i in range(a, b):
+            if sums[i] is None:
+                sums[i] = dict.fromkeys(scores, 0.0)
+            for label, score in scores.items():
+                sums[i][label] = sums[i].get(label, 0.0) + score
+            counts[i] += 1
+    chunk_scores = [{l: v / counts[i] for l, v in s.items()} if s else None for i, s in enumerate(sums)]
+
+    return _labels_with_hysteresis(_smooth(chunk_scores, scenes), scenes)
+
+def iter_classified_chunks(chunks, classifier, segment_chunks=SEGMENT_CHUNKS, gap_ms=SCENE_GAP_MS):
+    """
+    Streaming form of classify_chunks for (start_ms, end_ms, [words]) chunks.
+    Up to segment_chunks chunks are buffered and classified together (so short
+    scenes still share batches), cutting at the last scene break in the buffer;
+    labels match classify_chunks unless a single scene is longer than
+    segment_chunks. Yields (chunk, text, emotion).
+    """
+    buffer = []
+    last_gap = 0   # index of the first buffered chunk after the latest scene break
+
+    def classify(segment):
+        texts = [" ".join(c[2]) for c in segment]
+        labels = classify_chunks(texts, [c[0] for c in segment], [c[1] for c in segment], classifier)
+        return list(zip(segment, texts, labels))
+
+    for chunk in chunks:
+        if buffer and chunk[0] - buffer[-1][1] > gap_ms:
+            last_gap = len(buffer)
+        buffer.append(chunk)
+        if len(buffer) >= segment_chunks:
+            cut = last_gap or len(buffer)
+            yield from classify(buffer[:cut])
+            buffer = buffer[cut:]
+            last_gap = 0
+    if buffer:
+        yield from classify(buffer)
+
+# ----------------- BENCHMARK -----------------
+def _load_chunks(path):
+    from subtitle_grouping import group_words
+    from burn_word_subs import extract_word_list_from_result, MAX_CHUNK_MS, MAX_CHARS
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    words = extract_word_list_from_result(data) if isinstance(data, dict) else data
+    return [(s, e, " ".join(ws)) for s, e, ws in group_words(words, MAX_CHUNK_MS, MAX_CHARS)]
+
+def _flips(labels):
+    return sum(1 for a, b in zip(labels, labels[1:]) if a != b)
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else "interactive_subs.json"
+    from burn_word_subs import emotion_classifier
+
+    chunks = _load_chunks(path)
+    if not chunks:
+        print(f"No timed words found in {path}.")
+        return
+    starts = [c[0] for c in chunks]
+    ends = [c[1] for c in chunks]
+    texts = [c[2] for c in chunks]
+    minutes = max(1.0, ends[-1] - starts[0]) / 60000
+    print(f"{len(chunks)} subtitle chunks, {minutes:.1f} min of video")
+
+    # Before: one unbatched call per chunk
+    before = {"calls": len(texts), "seconds": 0.0, "labels": ['neutral'] * len(texts)}
+    if emotion_classifier:
+        started = time.perf_counter()
+        before["labels"] = [emotion_classifier(t[:400], truncation=True, max_length=512)[0]['label'].lower()
+                            for t in texts]
+        before["seconds"] = time.perf_counter() - started
+
+    # After: batched context windows
+    reset_stats()
+    windows = build_windows(texts, split_scenes(starts, ends))
+    after_labels = classify_chunks(texts, starts, ends, emotion_classifier)
+
+    print(f"  per-chunk : {before['calls'] / minutes:7.1f} model calls/min, {before['calls'] / minutes:7.1f} texts/min, "
+          f"{before['seconds']:.2f}s, {_flips(before['labels'])} label changes")
+    batches = stats["batches"] if emotion_classifier else -(-len(windows) // BATCH_SIZE)
+    print(f"  windowed  : {batches / minutes:7.1f} model calls/min, {len(windows) / minutes:7.1f} texts/min, "
+          f"{stats['seconds']:.2f}s, {_flips(after_labels)} label changes")
+    if not emotion_classifier:
+        print("  (emotion model not loaded: call counts only)")
+
+if __name__ == "__main__":
+    main()
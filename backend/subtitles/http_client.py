@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+http_client.py - Shared HTTP client for every external call (AssemblyAI, dictionary API)
+
+Keeps one pooled keep-alive requests.Session per host so repeated polls and
+lookups reuse the same TCP+TLS connection, applies default timeouts and a
+retry policy for idempotent requests, and records per-host request latency.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ----------------- CONFIG -----------------
+# The AssemblyAI key is only read from the environment, never stored in code
+ASSEMBLYAI_API_KEY = os.environ.get("ASSEMBLYAI_API_KEY", "")
+ASSEMBLYAI_BASE_URL = "https://api.assemblyai.com"
+DICTIONARY_BASE_URL = "https://api.dictionaryapi.dev/api/v2/entries/en"
+
+POOL_CONNECTIONS = 4          # distinct connection pools kept per session
+POOL_MAXSIZE = 16             # keep-alive connections per host (Flask threads, lookups)
+DEFAULT_TIMEOUT = (5, 30)     # (connect, read) seconds, used when a call gives none
+
+RETRY_TOTAL = 3               # retries for idempotent requests (GET/HEAD/...)
+RETRY_BACKOFF = 0.5           # seconds, urllib3 doubles it between attempts
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+LATENCY_SAMPLES = 1000        # recent samples kept per host for percentiles
+
+_sessions = {}
+_metrics = {}
+_lock = threading.Lock()
+
+class MissingAPIKeyError(RuntimeError):
+    """Raised when an AssemblyAI call is prepared without an API key."""
+
+# ----------------- SESSIONS -----------------
+def _host_key(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def _new_session():
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session(url):
+    """Return the shared pooled session for the host of 'url', creating it on first use."""
+    key = _host_key(url)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = _new_session()
+        return session
+
+def close_sessions():
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+def assemblyai_headers(api_key=None):
+    key = api_key or ASSEMBLYAI_API_KEY
+    if not key:
+        raise MissingAPIKeyError("No AssemblyAI API key found. Set the ASSEMBLYAI_API_KEY environment variable.")
+    return {"authorization": key}
+
+# ----------------- REQUESTS -----------------
+def request(method, url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Send a request through the host's pooled session and record its latency.
+    Accepts the same keyword arguments as requests.request.
+    """
+    session = get_session(url)
+    started = time.perf_counter()
+    ok = False
+    try:
+        response = session.request(method, url, timeout=timeout, **kwargs)
+        ok = True
+        return response
+    finally:
+        _record(_host_key(url), time.perf_counter() - started, ok)
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+# ----------------- METRICS -----------------
+def _record(host, seconds, ok):
+    with _lock:
+        m = _metrics.get(host)
+        if m is None:
+            m = _metrics[host] = {"count": 0, "errors": 0, "total": 0.0, "max": 0.0,
+                                  "samples": deque(maxlen=LATENCY_SAMPLES)}
+        m["count"] += 1
+        if not ok:
+            m["errors"] += 1
+        m["total"] += seconds
+        m["max"] = max(m["max"], seconds)
+        m["samples"].append(seconds)
+
+def latency_summary():
+    """Per-host request count, error count and latency stats in milliseconds."""
+    summary = {}
+    with _lock:
+        for host, m in _metrics.items():
+            samples = sorted(m["samples"])
+            pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000 if samples else 0.0
+            summary[host] = {
+                "count": m["count"],
+                "errors": m["errors"],
+                "mean_ms": round(m["total"] / m["count"] * 1000, 1) if m["count"] else 0.0,
+                "p50_ms": round(pick(0.50), 1),
+                "p95_ms": round(pick(0.95), 1),
+                "max_ms": round(m["max"] * 1000, 1),
+            }
+    return summary
+
+def print_latency_summary():
+    for host, s in latency_summary().items():
+        print(f"  {host}: {s['count']} requests ({s['errors']} errors), "
+              f"mean {s['mean_ms']}ms, p50 {s['p50_ms']}ms, p95 {s['p95_ms']}ms, max {s['max_ms']}ms")
+
+def reset_metrics():
+    with _lock:
+        _metrics.clear()
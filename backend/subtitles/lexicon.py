@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+lexicon.py - Local dictionary index for word definitions
+
+Builds a compact SQLite index from an open dictionary dump and answers
+lookups locally, so subtitle generation makes no per-word network calls.
+Inflected forms are mapped to their lemma ("went" -> "go") using the forms
+listed in the dump, a small table of irregular forms and suffix rules.
+
+Supported dumps:
+    *.jsonl / *.json   Wiktionary extract from https://kaikki.org (one entry per line)
+    *.tsv              word <TAB> definition [<TAB> example]
+
+Usage:
+    python lexicon.py build kaikki.org-dictionary-English.jsonl
+    python lexicon.py lookup went
+    python lexicon.py bench
+    python lexicon.py check      (lemma lookups against fixtures/lexicon_sample.jsonl)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import threading
+from functools import lru_cache
+
+# ----------------- CONFIG -----------------
+LEXICON_DB = os.environ.get("LEXICON_DB") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon.db")
+LOOKUP_CACHE_SIZE = 65536
+BATCH_SIZE = 5000
+
+# Common irregular forms, used when the dump does not list them
+IRREGULAR_FORMS = {
+    'am': 'be', 'is': 'be', 'are': 'be', 'was': 'be', 'were': 'be', 'been': 'be', 'being': 'be',
+    'has': 'have', 'had': 'have', 'does': 'do', 'did': 'do', 'done': 'do',
+    'went': 'go', 'gone': 'go', 'goes': 'go', 'came': 'come', 'saw': 'see', 'seen': 'see',
+    'took': 'take', 'taken': 'take', 'gave': 'give', 'given': 'give', 'got': 'get', 'gotten': 'get',
+    'made': 'make', 'said': 'say', 'knew': 'know', 'known': 'know', 'thought': 'think',
+    'told': 'tell', 'found': 'find', 'left': 'leave', 'felt': 'feel', 'brought': 'bring',
+    'bought': 'buy', 'kept': 'keep', 'began': 'begin', 'begun': 'begin', 'ran': 'run',
+    'wrote': 'write', 'written': 'write', 'ate': 'eat', 'eaten': 'eat', 'spoke': 'speak',
+    'children': 'child', 'men': 'man', 'women': 'woman', 'feet': 'foot', 'teeth': 'tooth',
+    'mice': 'mouse', 'people': 'person', 'better': 'good', 'best': 'good', 'worse': 'bad', 'worst': 'bad',
+}
+
+# (suffix, replacement) candidates tried in order for regular inflections
+SUFFIX_RULES = [
+    ('ies', 'y'), ('ied', 'y'), ('ier', 'y'), ('iest', 'y'),
+    ('ves', 'f'), ('ves', 'fe'), ('es', ''), ('s', ''),
+    ('ing', ''), ('ing', 'e'), ('ed', ''), ('ed', 'e'), ('er', ''), ('est', ''), ('ly', ''),
+]
+
+_STRIP_CHARS = '.,?!;:"()[]{}…“”‘’'
+_local = threading.local()
+
+# ----------------- BUILD -----------------
+def _iter_kaikki(path):
+    """Yield (word, definition, example, lemma) from a kaikki.org JSONL dump."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            word = (entry.get("word") or "").lower()
+            if not word or entry.get("lang_code", "en") != "en":
+                continue
+            definition, example, lemma = "", "", None
+            for sense in entry.get("senses") or []:
+                form_of = sense.get("form_of") or sense.get("alt_of")
+                if form_of and not lemma:
+                    lemma = (form_of[0].get("word") or "").lower() or None
+                    continue
+                glosses = sense.get("glosses") or []
+                if not glosses:
+                    continue
+                examples = [e.get("text") for e in sense.get("examples") or [] if e.get("text")]
+                if not definition or (examples and not example):
+                    definition = glosses[-1]
+                    example = examples[0] if examples else ""
+                if example:
+                    break
+            yield word, definition, example, lemma
+            # Inflections listed on the lemma's own entry ("go": forms "went", "gone", ...)
+            for form in entry.get("forms") or []:
+                text = (form.get("form") or "").lower()
+                if text and text != word and " " not in text:
+                    yield text, "", "", word
+
+def _iter_tsv(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) >= 2 and parts[0]:
+                yield parts[0].lower(), parts[1], parts[2] if len(parts) > 2 else "", None
+
+def build_index(dump_path, db_path=LEXICON_DB):
+    """Import a dictionary dump into a fresh SQLite index at db_path."""
+    print(f"Building lexicon index '{db_path}' from '{dump_path}' ...")
+    records = _iter_tsv(dump_path) if dump_path.lower().endswith(".tsv") else _iter_kaikki(dump_path)
+
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE entries (word TEXT PRIMARY KEY, definition TEXT NOT NULL, example TEXT NOT NULL) WITHOUT ROWID;
+        CREATE TABLE forms (form TEXT PRIMARY KEY, lemma TEXT NOT NULL) WITHOUT ROWID;
+    """)
+    # Several entries per word (one per part of speech): keep the first one that has an example
+    upsert_entry = """
+        INSERT INTO entries (word, definition, example) VALUES (?, ?, ?)
+        ON CONFLICT(word) DO UPDATE SET definition = excluded.definition, example = excluded.example
+        WHERE entries.example = '' AND excluded.example != ''
+    """
+    insert_form = "INSERT OR IGNORE INTO forms (form, lemma) VALUES (?, ?)"
+
+    entries, forms, count = [], [], 0
+    for word, definition, example, lemma in records:
+        if definition:
+            entries.append((word, definition, example))
+        if lemma and lemma != word:
+            forms.append((word, lemma))
+        if len(entries) >= BATCH_SIZE or len(forms) >= BATCH_SIZE:
+            conn.executemany(upsert_entry, entries)
+            conn.executemany(insert_form, forms)
+            count += len(entries)
+            entries, forms = [], []
+            print(f"\r  {count} definitions imported", end="")
+    conn.executemany(upsert_entry, entries)
+    conn.executemany(insert_form, forms)
+    conn.commit()
+
+    n_entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    n_forms = conn.execute("SELECT COUNT(*) FROM forms").fetchone()[0]
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp_path, db_path)
+    print(f"\nLexicon written: {n_entries} words, {n_forms} inflected forms ({os.path.getsize(db_path) / 1048576:.1f} MB)")
+    clear_cache()
+    return db_path
+
+# ----------------- LOOKUP -----------------
+def is_available(db_path=LEXICON_DB):
+    return os.path.exists(db_path)
+
+def _connection(db_path):
+    """One read-only connection per thread (Flask and the live server are threaded)."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = conns[db_path] = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    return conn
+
+def normalize(word):
+    return word.strip().strip(_STRIP_CHARS).lower()
+
+def _candidates(word):
+    """Yield the word itself followed by possible lemmas from the irregular table and suffix rules."""
+    yield word
+    if word.endswith("'s") or word.endswith("’s"):
+        yield word[:-2]
+    if word in IRREGULAR_FORMS:
+        yield IRREGULAR_FORMS[word]
+    for suffix, replacement in SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            stem = word[:-len(suffix)] + replacement
+            yield stem
+            # running -> run, stopped -> stop
+            if not replacement and len(stem) >= 3 and stem[-1] == stem[-2]:
+                yield stem[:-1]
+
+def _lookup_uncached(word, db_path):
+    conn = _connection(db_path)
+    # A known inflection goes to its lemma first, even when the form has a headword of its
+    # own: "went" is "go", not the obsolete noun; "saw" is "see", not the tool
+    form = conn.execute("SELECT lemma FROM forms WHERE form = ?", (word,)).fetchone()
+    lemma = form[0] if form is not None else IRREGULAR_FORMS.get(word)
+    if lemma:
+        row = conn.execute("SELECT definition, example FROM entries WHERE word = ?", (lemma,)).fetchone()
+        if row is not None:
+            return {"definition": row[0], "example": row[1] or "No example available."}
+
+    seen = set()
+    for candidate in _candidates(word):
+        if candidate in seen:
+            continue
+        seen.add(candidate)
+        row = conn.execute("SELECT definition, example FROM entries WHERE word = ?", (candidate,)).fetchone()
+        if row is None:
+            form = conn.execute("SELECT lemma FROM forms WHERE form = ?", (candidate,)).fetchone()
+            if form is not None:
+                row = conn.execute("SELECT definition, example FROM entries WHERE word = ?", (form[0],)).fetchone()
+        if row is not None:
+            return {"definition": row[0], "example": row[1] or "No example available."}
+    return None
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def _lookup_cached(word, db_path):
+    return _lookup_uncached(word, db_path)
+
+def lookup(word, db_path=LEXICON_DB):
+    """
+    Return {"definition", "example"} for 'word' (or its lemma) from the local
+    index, or None when the word is unknown or no index has been built.
+    """
+    word = normalize(word)
+    if not word or not is_available(db_path):
+        return None
+    entry = _lookup_cached(word, db_path)
+    return dict(entry) if entry else None
+
+def clear_cache():
+    _lookup_cached.cache_clear()
+
+# ----------------- CLI -----------------
+FIXTURE_DUMP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "lexicon_sample.jsonl")
+
+def check(dump_path=FIXTURE_DUMP):
+    """Build an index from the sample dump and assert the lemma lookups; raises AssertionError on failure."""
+    import tempfile
+    expected = {
+        "went": "To move from one place to another.",        # verb form beats the obsolete noun
+        "Went,": "To move from one place to another.",
+        "saw": "To perceive or detect with the eyes.",       # verb form beats the tool
+        "running": "To move swiftly on foot.",               # listed form beats the gerund noun
+        "ran": "To move swiftly on foot.",
+        "stopped": "To cease moving.",                       # suffix rule, no forms listed
+        "cats": "A small domesticated carnivorous mammal.",
+        "saws": "A tool with a toothed blade used for cutting hard substances.",
+        "cat": "A small domesticated carnivorous mammal.",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = build_index(dump_path, os.path.join(tmp, "lexicon.db"))
+        for word, definition in expected.items():
+            entry = lookup(word, db_path)
+            assert entry and entry["definition"] == definition, f"{word!r} -> {entry}, expected {definition!r}"
+        assert lookup("monster", db_path) is None, "non-English entries must be skipped"
+        _local.conns.pop(db_path).close()
+    clear_cache()
+    print(f"Lexicon check passed ({len(expected) + 1} lookups against {os.path.basename(dump_path)}).")
+
+def bench(db_path=LEXICON_DB, n=100000):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    words = [row[0] for row in conn.execute("SELECT word FROM entries ORDER BY random() LIMIT 10000")]
+    conn.close()
+    if not words:
+        print("Lexicon is empty.")
+        return
+    sample = [random.choice(words) for _ in range(n)]
+
+    clear_cache()
+    started = time.perf_counter()
+    for w in sample[:10000]:
+        _lookup_uncached(w, db_path)
+    uncached = (time.perf_counter() - started) / 10000
+    started = time.perf_counter()
+    for w in sample:
+        lookup(w, db_path)
+    mixed = (time.perf_counter() - started) / n
+    print(f"Uncached lookup: {uncached * 1e6:.1f} µs/word, cached workload: {mixed * 1e6:.1f} µs/word")
+
+def main():
+    parser = argparse.ArgumentParser(description="Local dictionary index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="import a dictionary dump")
+    p_build.add_argument("dump")
+    p_build.add_argument("--out", default=LEXICON_DB)
+    p_lookup = sub.add_parser("lookup", help="look words up")
+    p_lookup.add_argument("words", nargs="+")
+    sub.add_parser("bench", help="measure lookup latency")
+    sub.add_parser("check", help="verify lemma lookups against the sample dump")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.dump, args.out)
+        return
+    if args.command == "check":
+        check()
+        return
+    if not is_available():
+        print(f"ERROR: no lexicon index at {LEXICON_DB}. Run: python lexicon.py build <dump>")
+        sys.exit(1)
+    if args.command == "lookup":
+        for w in args.words:
+            print(f"{w}: {lookup(w)}")
+    else:
+        bench()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+live_subs.py - Live/streaming emotion subtitles
+
+Sends audio from a file or a live ffmpeg source to a real-time ASR backend in
+small frames, groups finalized words into subtitle chunks with the same
+MAX_CHUNK_MS / MAX_CHARS rules as burn_word_subs.py, tags each chunk with an
+emotion as soon as it closes and pushes everything to the web app over
+Server-Sent Events (open http://localhost:8000/?live=1).
+
+Backends:
+    assemblyai  AssemblyAI universal streaming (needs: pip install websocket-client)
+    replay      local stand-in that replays words from a transcript JSON
+                (AssemblyAI result or interactive_subs.json) against the audio clock
+
+Examples:
+    python live_subs.py MonsterInc.mp3
+    python live_subs.py "audio=Microphone" --input-format dshow
+    python live_subs.py --backend replay --replay-json interactive_subs.json
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import queue
+import bisect
+import argparse
+import threading
+import subprocess
+import webbrowser
+import http.server
+from collections import deque
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+
+# ----------------- CONFIG -----------------
+PORT = 8000
+SAMPLE_RATE = 16000          # Hz, mono 16-bit PCM as expected by the streaming API
+FRAME_MS = 50                # audio sent per frame; AssemblyAI accepts 50-1000 ms
+STREAMING_URL = "wss://streaming.assemblyai.com/v3/ws"
+SSE_KEEPALIVE = 15           # seconds between keep-alive comments on idle streams
+
+# ----------------- AUDIO -----------------
+class AudioClock:
+    """Remembers when each position of the audio stream was captured, for latency metrics."""
+
+    def __init__(self, maxlen=20000):
+        self.maxlen = maxlen
+        self._audio_ms = []
+        self._captured = []
+        self._lock = threading.Lock()
+
+    def mark(self, audio_ms):
+        with self._lock:
+            self._audio_ms.append(audio_ms)
+            self._captured.append(time.perf_counter())
+            if len(self._audio_ms) > 2 * self.maxlen:
+                del self._audio_ms[:self.maxlen]
+                del self._captured[:self.maxlen]
+
+    def captured_at(self, audio_ms):
+        """Wall-clock time (perf_counter) of the frame that contained 'audio_ms'."""
+        with self._lock:
+            if not self._audio_ms:
+                return None
+            i = bisect.bisect_left(self._audio_ms, audio_ms)
+            return self._captured[min(i, len(self._captured) - 1)]
+
+def iter_audio_frames(source, clock, frame_ms=FRAME_MS, sample_rate=SAMPLE_RATE, input_format=None, realtime=True):
+    """
+    Yield (pcm_bytes, audio_ms) frames of 16-bit mono PCM.
+    Plain .wav files are read directly; anything else (files, devices, URLs)
+    is decoded by ffmpeg. Files are paced at real time so they behave like a
+    live source; devices are real time already.
+    """
+    frame_bytes = sample_rate * 2 * frame_ms // 1000
+    if source.lower().endswith(".wav") and not input_format:
+        yield from _iter_wav_frames(source, clock, frame_ms, sample_rate, frame_bytes, realtime)
+        return
+
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    if input_format:
+        cmd += ["-f", input_format]
+    elif realtime:
+        cmd += ["-re"]
+    cmd += ["-i", source, "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    audio_ms = 0
+    try:
+        while True:
+            data = proc.stdout.read(frame_bytes)
+            if not data:
+                break
+            audio_ms += len(data) * 1000 // (sample_rate * 2)
+            clock.mark(audio_ms)
+            yield data, audio_ms
+    finally:
+        proc.kill()
+        proc.wait()
+
+def _iter_wav_frames(path, clock, frame_ms, sample_rate, frame_bytes, realtime):
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getframerate() != sample_rate:
+            print(f"ERROR: {path} must be {sample_rate} Hz mono 16-bit PCM (or let ffmpeg convert it).")
+            sys.exit(1)
+        started = time.perf_counter()
+        audio_ms = 0
+        while True:
+            data = wav.readframes(frame_bytes // 2)
+            if not data:
+                break
+            audio_ms += len(data) * 1000 // (sample_rate * 2)
+            if realtime:
+                time.sleep(max(0.0, started + audio_ms / 1000 - time.perf_counter()))
+            clock.mark(audio_ms)
+            yield data, audio_ms
+
+def silent_frames(duration_ms, clock, frame_ms=FRAME_MS, sample_rate=SAMPLE_RATE, realtime=True):
+    """Real-time paced silence, used to drive the replay backend without an audio source."""
+    frame = b"\x00" * (sample_rate * 2 * frame_ms // 1000)
+    started = time.perf_counter()
+    for audio_ms in range(frame_ms, duration_ms + frame_ms, frame_ms):
+        if realtime:
+            time.sleep(max(0.0, started + audio_ms / 1000 - time.perf_counter()))
+        clock.mark(audio_ms)
+        yield frame, audio_ms
+
+# ----------------- ASR BACKENDS -----------------
+# Every backend exposes stream(frames) which yields (new_final_words, partial_words, final_ms):
+# words that will not change any more, the current unstable hypothesis, and a position
+# no later finalized word can end before.
+
+class ReplayASR:
+    """Local stand-in for a streaming ASR: releases known words as the audio clock passes them."""
+
+    def __init__(self, words):
+        self.words = sorted((w for w in words if w.get("start") is not None and w.get("end") is not None),
+                            key=lambda w: (w["start"], w["end"]))
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            from burn_word_subs import extract_word_list_from_result
+            data = extract_word_list_from_result(data)
+        return cls([{"text": w.get("text") or "", "start": int(float(w["start"])), "end": int(float(w["end"]))}
+                    for w in data])
+
+    @property
+    def duration_ms(self):
+        return self.words[-1]["end"] if self.words else 0
+
+    def stream(self, frames):
+        released = 0
+        for _, audio_ms in frames:
+            start = released
+            while released < len(self.words) and self.words[released]["end"] <= audio_ms:
+                released += 1
+            in_progress = [w for w in self.words[released:released + 8] if w["start"] <= audio_ms]
+            yield self.words[start:released], in_progress, audio_ms
+
+class AssemblyAIStreamingASR:
+    """AssemblyAI universal streaming over a WebSocket (audio sent from a background thread)."""
+
+    def __init__(self, api_key=None, sample_rate=SAMPLE_RATE, url=STREAMING_URL):
+        try:
+            import websocket
+        except ImportError:
+            print("ERROR: the assemblyai backend needs websocket-client (pip install websocket-client).")
+            sys.exit(1)
+        self._websocket = websocket
+        self.api_key = api_key or http_client.ASSEMBLYAI_API_KEY
+        if not self.api_key:
+            print("ERROR: No AssemblyAI API key found. Set the ASSEMBLYAI_API_KEY environment variable.")
+            sys.exit(1)
+        self.url = f"{url}?sample_rate={sample_rate}&encoding=pcm_s16le&format_turns=true"
+
+    def stream(self, frames):
+        ws = self._websocket.create_connection(self.url, header={"Authorization": self.api_key})
+        errors = []
+
+        def send_audio():
+            try:
+                for data, _ in frames:
+                    ws.send_binary(data)
+                ws.send(json.dumps({"type": "Terminate"}))
+            except Exception as e:
+                errors.append(e)
+
+        sender = threading.Thread(target=send_audio, daemon=True)
+        sender.start()
+        emitted = {}   # turn_order -> number of final words already yielded
+        final_ms = 0   # end of the last finalized word; the sender's position runs ahead of it
+        try:
+            while True:
+                try:
+                    message = json.loads(ws.recv())
+                except (self._websocket.WebSocketConnectionClosedException, ValueError):
+                    break
+                kind = message.get("type")
+                if kind == "Termination":
+                    break
+                # Formatted turns repeat the same words with punctuation; finals were already sent
+                if kind != "Turn" or message.get("turn_is_formatted"):
+                    continue
+                words = [{"text": w.get("text") or "", "start": w.get("start"), "end": w.get("end")}
+                         for w in message.get("words") or []]
+                final_count = sum(1 for w in message.get("words") or [] if w.get("word_is_final"))
+                if message.get("end_of_turn"):
+                    final_count = len(words)
+                turn = message.get("turn_order")
+                done = emitted.get(turn, 0)
+                emitted[turn] = max(done, final_count)
+                for w in words[done:final_count]:
+                    if isinstance(w["end"], (int, float)):
+                        final_ms = max(final_ms, w["end"])
+                yield words[done:final_count], words[final_count:], final_ms
+        finally:
+            ws.close()
+            sender.join(timeout=1)
+        if errors:
+            print("Error streaming audio:", errors[0])
+
+# ----------------- SUBTITLES -----------------
+class LiveSubtitler:
+    """
+    Incremental version of the grouping in words_to_grouped_srt_and_json.
+    Finalized words grow the open chunk until the MAX_CHUNK_MS / MAX_CHARS rules
+    close it. A closed chunk is published at once; its emotion and definitions
+    are computed on a worker thread (model and dictionary calls would otherwise
+    stall the ASR loop) and sent as a chunk_update. The open chunk and the
+    partial hypothesis are published on every change, colored with the
+    previous chunk's emotion until their own is known.
+    """
+
+    def __init__(self, publish, clock, max_chunk_ms, max_chars, pad_ms, detect_emotion, get_definition):
+        self.publish = publish
+        self.clock = clock
+        self.max_chunk_ms = max_chunk_ms
+        self.max_chars = max_chars
+        self.pad_ms = pad_ms
+        self.detect_emotion = detect_emotion
+        self.get_definition = get_definition
+        self.chunk_id = 0
+        self.cur_words = []
+        self.cur_start = None
+        self.cur_end = None
+        self.cur_chars = 0
+        self.last_emotion = "neutral"
+        self.last_pending = None
+        self.latencies = deque(maxlen=100000)
+        # One worker keeps chunk_updates in chunk order
+        self._annotator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-annotate")
+
+    def update(self, new_final, partial_words, final_ms):
+        for w in new_final:
+            self._add_word(w)
+        # No later finalized word ends before final_ms, so once it passes the limit the chunk can not grow
+        if self.cur_words and final_ms - self.cur_start > self.max_chunk_ms:
+            self._close_chunk()
+
+        pending = [w["text"] for w in self.cur_words] + [w["text"] for w in partial_words]
+        # An empty pending list is not published so a closed chunk stays on screen during silence
+        if pending and pending != self.last_pending:
+            self.last_pending = pending
+            words = self.cur_words + list(partial_words)
+            self.publish({
+                "type": "pending",
+                "chunk_id": self.chunk_id,
+                "words": [{"text": w["text"], "start": w["start"], "end": w["end"],
+                           "emotion": self.last_emotion, "final": False} for w in words]
+            })
+        self._record_latency(new_final)
+
+    def finish(self):
+        if self.cur_words:
+            self._close_chunk()
+        self._annotator.shutdown(wait=True)
+        self.publish({"type": "end"})
+
+    def _add_word(self, w):
+        text = w.get("text") or ""
+        try:
+            start = int(float(w.get("start")))
+            end = int(float(w.get("end")))
+        except Exception:
+            return
+        word = {"text": text, "start": start, "end": end}
+        if self.cur_start is None:
+            self.cur_start, self.cur_end, self.cur_words, self.cur_chars = start, end, [word], len(text)
+            return
+        prospective_chars = self.cur_chars + 1 + len(text)
+        if (end - self.cur_start > self.max_chunk_ms) or (prospective_chars > self.max_chars):
+            self._close_chunk()
+            self.cur_start, self.cur_end, self.cur_words, self.cur_chars = start, end, [word], len(text)
+        else:
+            self.cur_words.append(word)
+            self.cur_end = end
+            self.cur_chars = prospective_chars
+
+    def _close_chunk(self):
+        entries = [{"start": self.cur_start, "end": self.cur_end + self.pad_ms, "text": w["text"],
+                    "emotion": self.last_emotion, "final": True} for w in self.cur_words]
+        self.publish({"type": "chunk", "chunk_id": self.chunk_id, "words": entries})
+        self._annotator.submit(self._annotate_chunk, self.chunk_id, entries)
+        self.chunk_id += 1
+        self.cur_words, self.cur_start, self.cur_end, self.cur_chars = [], None, None, 0
+        self.last_pending = None
+
+    def _annotate_chunk(self, chunk_id, entries):
+        """Worker thread: add the chunk's emotion and word definitions, then publish the update."""
+        try:
+            emotion = self.detect_emotion(" ".join(e["text"] for e in entries))
+            words = []
+            for e in entries:
+                definition_data = self.get_definition(e["text"].strip('.,?!').lower())
+                words.append(dict(e, emotion=emotion, definition=definition_data["definition"],
+                                  example=definition_data["example"]))
+        except Exception as e:
+            print(f"Error annotating live chunk {chunk_id}: {str(e)[:100]}")
+            return
+        self.last_emotion = emotion
+        self.publish({"type": "chunk_update", "chunk_id": chunk_id, "words": words})
+
+    def _record_latency(self, words):
+        """Time from capturing the end of each finalized word to its first publication."""
+        now = time.perf_counter()
+        for w in words:
+            captured = self.clock.captured_at(w["end"])
+            if captured is not None:
+                self.latencies.append(now - captured)
+
+    def print_latency_summary(self):
+        if not self.latencies:
+            print("No words were published.")
+            return
+        samples = sorted(self.latencies)
+        p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+        print(f"Glass-to-subtitle latency over {len(samples)} words: "
+              f"mean {sum(samples) / len(samples) * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms, max {samples[-1] * 1000:.0f}ms")
+
+# ----------------- SERVER-SENT EVENTS -----------------
+class EventBroadcaster:
+    """Fans published events out to every connected SSE client."""
+
+    def __init__(self):
+        self._clients = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue()
+        with self._lock:
+            self._clients.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._clients.discard(q)
+
+    def publish(self, event):
+        event = dict(event, sent_at=time.time())
+        data = json.dumps(event)
+        with self._lock:
+            for q in self._clients:
+                q.put(data)
+
+class LiveHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files from the subtitles folder (like start_server.py) plus the /events stream."""
+
+    def __init__(self, *args, broadcaster=None, **kwargs):
+        self.broadcaster = broadcaster
+        super().__init__(*args, **kwargs)
+
+    def end_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        super().end_headers()
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/events":
+            return super().do_GET()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        q = self.broadcaster.subscribe()
+        try:
+            while True:
+                try:
+                    data = q.get(timeout=SSE_KEEPALIVE)
+                    self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.broadcaster.unsubscribe(q)
+
+    def log_message(self, format, *args):
+        if not self.path.startswith("/events"):
+            super().log_message(format, *args)
+
+def start_event_server(broadcaster, port=PORT, directory=None):
+    handler = partial(LiveHTTPRequestHandler, broadcaster=broadcaster,
+                      directory=directory or os.path.dirname(os.path.abspath(__file__)))
+    httpd = http.server.ThreadingHTTPServer(("", port), handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+# ----------------- MAIN FLOW -----------------
+def main():
+    parser = argparse.ArgumentParser(description="Live emotion subtitles over Server-Sent Events")
+    parser.add_argument("source", nargs="?", help="audio/video file, URL or ffmpeg device name")
+    parser.add_argument("--input-format", help="ffmpeg input format for live devices (dshow, avfoundation, pulse, ...)")
+    parser.add_argument("--backend", choices=["assemblyai", "replay"], default="assemblyai")
+    parser.add_argument("--replay-json", help="transcript JSON replayed by the replay backend")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--no-browser", action="store_true")
+    args = parser.parse_args()
+
+    from burn_word_subs import detect_emotion_lightweight, get_word_definition, MAX_CHUNK_MS, MAX_CHARS, PAD_MS
+
+    clock = AudioClock()
+    if args.backend == "replay":
+        if not args.replay_json:
+            parser.error("--backend replay needs --replay-json")
+        asr = ReplayASR.from_json(args.replay_json)
+        frames = (iter_audio_frames(args.source, clock, input_format=args.input_format) if args.source
+                  else silent_frames(asr.duration_ms + 1000, clock))
+    else:
+        if not args.source:
+            parser.error("an audio source is required for the assemblyai backend")
+        asr = AssemblyAIStreamingASR()
+        frames = iter_audio_frames(args.source, clock, input_format=args.input_format)
+
+    broadcaster = EventBroadcaster()
+    httpd = start_event_server(broadcaster, args.port)
+    print(f"🚀 Live subtitles at http://localhost:{args.port}/?live=1")
+    if not args.no_browser:
+        webbrowser.open(f"http://localhost:{args.port}/?live=1")
+
+    subtitler = LiveSubtitler(broadcaster.publish, clock, MAX_CHUNK_MS, MAX_CHARS, PAD_MS,
+                              detect_emotion_lightweight, get_word_definition)
+    try:
+        for new_final, partial_words, final_ms in asr.stream(frames):
+            subtitler.update(new_final, partial_words, final_ms)
+        subtitler.finish()
+        subtitler.print_latency_summary()
+        print("Stream finished. Press Ctrl+C to stop the server")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        subtitler.print_latency_summary()
+        print("\n👋 Server stopped. Goodbye!")
+    finally:
+        httpd.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -19,21 +19,47 @@ document.addEventListener("DOMContentLoaded", () => {
         'neutral': '😐'
     };
 
-    // --- Fetch and load subtitle data ---
-    fetch("interactive_subs.json")
-        .then(response => response.json())
-        .then(data => {
-            subtitles = data;
-        })
-        .catch(error => console.error('Error loading subtitles:', error));
+    // --- Live mode (?live=1): words arrive over Server-Sent Events from live_subs.py ---
+    const isLiveMode = new URLSearchParams(window.location.search).has("live");
+
+    if (isLiveMode) {
+        const events = new EventSource("events");
+        let shownChunkId = null;
+        events.onmessage = (e) => {
+            const event = JSON.parse(e.data);
+            if (event.type === "pending" || event.type === "chunk") {
+                shownChunkId = event.chunk_id;
+                renderWords(event.words);
+            } else if (event.type === "chunk_update" && event.chunk_id === shownChunkId) {
+                // Emotion and definitions arrive after the chunk itself
+                renderWords(event.words);
+            }
+        };
+        events.onerror = () => console.error('Live subtitle stream disconnected, retrying...');
+    } else {
+        // --- Fetch and load subtitle data ---
+        fetch("interactive_subs.json")
+            .then(response => response.json())
+            .then(data => {
+                subtitles = data;
+            })
+            .catch(error => console.error('Error loading subtitles:', error));
+    }
 
     // --- Video Time Update Listener ---
     videoPlayer.addEventListener("timeupdate", () => {
+        if (isLiveMode) {
+            return;
+        }
         const currentTime = videoPlayer.currentTime * 1000; // Convert to ms
         const words = subtitles.filter(word => 
             currentTime >= word.start && currentTime <= word.end
         );
-        
+        renderWords(words);
+    });
+
+    // --- Subtitle Rendering ---
+    const renderWords = (words) => {
         subtitleOverlay.innerHTML = ''; // Clear previous subtitles
         if (words.length > 0) {
             // Group words into lines based on punctuation
@@ -62,8 +88,8 @@ document.addEventListener("DOMContentLoaded", () => {
                     wordSpan.classList.add('subtitle-word', colorClass);
                     
                     wordSpan.textContent = word.text;
-                    wordSpan.dataset.definition = word.definition;
-                    wordSpan.dataset.example = word.example;
+                    wordSpan.dataset.definition = word.definition || 'Definition pending...';
+                    wordSpan.dataset.example = word.example || 'Example pending...';
                     wordSpan.dataset.emotion = emotion;
 
                     wordSpan.addEventListener('click', handleWordClick);
@@ -85,7 +111,7 @@ document.addEventListener("DOMContentLoaded", () => {
                 subtitleOverlay.appendChild(lineDiv);
             });
         }
-    });
+    };
 
     // --- Event Handlers ---
     const handleWordClick = (e) => {
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+subtitle_grouping.py - Vectorized grouping of timed words into subtitle chunks
+
+Converts the AssemblyAI word list into NumPy arrays once, finds every chunk
+boundary with the same MAX_CHUNK_MS / MAX_CHARS rules as the original
+per-word loop in burn_word_subs.py, and writes SRT in bulk. iter_chunks and
+the SrtWriter / JsonArrayWriter classes do the same for word streams of any
+length with bounded memory.
+
+Run directly to check equivalence with the pure-Python loop (exits non-zero
+on any mismatch) and benchmark against it:
+    python subtitle_grouping.py
+"""
+
+import os
+import json
+import time
+
+import numpy as np
+
+BLOCK_WORDS = 50000      # words grouped per NumPy pass by iter_chunks
+FLUSH_LINES = 1000       # SRT lines formatted per write by SrtWriter
+
+def words_to_arrays(words):
+    """
+    Return (texts, starts, ends) for the words that have usable timestamps.
+    Matches the old int(float(...)) conversion: words whose start or end is
+    missing, non-numeric or not finite are dropped, values are truncated.
+    """
+    raw_starts = [w.get("start") for w in words]
+    raw_ends = [w.get("end") for w in words]
+    try:
+        starts = np.array(raw_starts, dtype=np.float64)
+        ends = np.array(raw_ends, dtype=np.float64)
+    except (TypeError, ValueError):
+        starts = np.array([_to_float(v) for v in raw_starts], dtype=np.float64)
+        ends = np.array([_to_float(v) for v in raw_ends], dtype=np.float64)
+
+    valid = np.isfinite(starts) & np.isfinite(ends)
+    if valid.all():
+        texts = [w.get("text") or "" for w in words]
+    else:
+        texts = [w.get("text") or "" for w, ok in zip(words, valid.tolist()) if ok]
+        starts = starts[valid]
+        ends = ends[valid]
+    return texts, np.trunc(starts).astype(np.int64), np.trunc(ends).astype(np.int64)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def chunk_boundaries(starts, ends, lengths, max_chunk_ms, max_chars):
+    """
+    Return the index of the first word of every chunk.
+
+    A chunk started at word i grows while the joined text stays within
+    max_chars and each added word ends within max_chunk_ms of starts[i].
+    For every i the break position is computed at once: the character rule
+    from a cumulative sum of (len + 1) and a binary search, the duration rule
+    by scanning only as many following words as the character rule could
+    ever let into one chunk. The chunk starts are then
+    read off by following the break pointers from word 0.
+    """
+    n = len(starts)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # cum[k] = characters (including one separator per word) of words [0, k)
+    cum = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths + 1, out=cum[1:])
+    # first k with cum[k] - cum[i] - 1 > max_chars  ->  words [i, k-1) fit
+    char_break = np.searchsorted(cum, cum[:-1] + 1 + max_chars, side="right") - 1
+
+    limit = starts + max_chunk_ms
+    idx = np.arange(n, dtype=np.int64)
+    if n < 2 or np.all(ends[1:] >= ends[:-1]):
+        dur_break = np.searchsorted(ends, limit, side="right")
+    else:
+        dur_break = np.full(n, n, dtype=np.int64)
+        longest = int((char_break - idx).max())
+        for d in range(1, min(longest + 1, n)):
+            over = (ends[d:] > limit[:-d]) & (dur_break[:-d] == n)
+            dur_break[:-d][over] = idx[d:][over]
+
+    next_start = np.minimum(char_break, dur_break)
+    np.maximum(next_start, idx + 1, out=next_start)   # the first word always fits
+
+    firsts = []
+    nxt = next_start.tolist()
+    i = 0
+    while i < n:
+        firsts.append(i)
+        i = nxt[i]
+    return np.array(firsts, dtype=np.int64)
+
+def group_words(words, max_chunk_ms, max_chars):
+    """
+    Group words into subtitle chunks.
+    Yields one (start_ms, end_ms, [word texts]) tuple per chunk; the word lists
+    are created lazily so callers that only keep the joined text stay cheap.
+    """
+    texts, starts, ends = words_to_arrays(words)
+    yield from _group_arrays(texts, starts, ends, max_chunk_ms, max_chars, keep_last=True)
+
+def iter_chunks(words, max_chunk_ms, max_chars, block_words=BLOCK_WORDS):
+    """
+    Same chunks as group_words for any iterable of words (e.g. a streaming
+    parser), holding at most one block of words in memory. The words of the
+    last chunk of a block may still be joined by the next block, so they are
+    carried over; everything before it is final.
+    """
+    carry = []
+    block = []
+    for w in words:
+        block.append(w)
+        if len(block) >= block_words:
+            texts, starts, ends = words_to_arrays(carry + block)
+            block = []
+            carry = yield from _group_arrays(texts, starts, ends, max_chunk_ms, max_chars, keep_last=False)
+    texts, starts, ends = words_to_arrays(carry + block)
+    yield from _group_arrays(texts, starts, ends, max_chunk_ms, max_chars, keep_last=True)
+
+def _group_arrays(texts, starts, ends, max_chunk_ms, max_chars, keep_last):
+    """
+    Yield the chunks of one block of words. With keep_last=False the last
+    chunk is held back and its words are returned for the next block.
+    """
+    if not texts:
+        return []
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    firsts = chunk_boundaries(starts, ends, lengths, max_chunk_ms, max_chars)
+    lasts = np.append(firsts[1:], len(texts)) - 1
+
+    chunk_starts = starts[firsts].tolist()
+    chunk_ends = ends[lasts].tolist()
+    bounds = np.append(firsts, len(texts)).tolist()
+    n_chunks = len(firsts) if keep_last else len(firsts) - 1
+    for k in range(n_chunks):
+        yield chunk_starts[k], chunk_ends[k], texts[bounds[k]:bounds[k + 1]]
+    if keep_last:
+        return []
+    tail = bounds[-2]
+    return [{"text": t, "start": st, "end": en}
+            for t, st, en in zip(texts[tail:], starts[tail:].tolist(), ends[tail:].tolist())]
+
+def format_srt(lines, first_index=1):
+    """
+    Render (start_ms, end_ms, text) tuples as SRT text, numbered from first_index.
+    Timestamps are split into fields with NumPy and the whole file is produced
+    by a single %-format call instead of one f-string per line.
+    """
+    n = len(lines)
+    if n == 0:
+        return ""
+    starts = np.array([line[0] for line in lines], dtype=np.int64)
+    ends = np.array([line[1] for line in lines], dtype=np.int64)
+    ends = np.where(ends <= starts, starts + 20, ends)
+
+    fields = np.empty((n, 10), dtype=object)
+    fields[:, 0] = np.arange(first_index, first_index + n)
+    for col, ms in ((1, starts), (5, ends)):
+        hours, rem = np.divmod(ms, 3600000)
+        minutes, rem = np.divmod(rem, 60000)
+        seconds, millis = np.divmod(rem, 1000)
+        fields[:, col], fields[:, col + 1], fields[:, col + 2], fields[:, col + 3] = hours, minutes, seconds, millis
+    fields[:, 9] = [line[2].strip() for line in lines]
+    template = "%d\n%02d:%02d:%02d,%03d --> %02d:%02d:%02d,%03d\n%s\n\n"
+    return (template * n) % tuple(fields.ravel().tolist())
+
+def write_srt(srt_path, lines):
+    with open(srt_path, "w", encoding="utf-8") as f:
+        f.write(format_srt(lines))
+
+class _StagedOutput:
+    """
+    Output file written as '<path>.tmp' and moved into place by close().
+    Leaving the 'with' block through an exception calls abort() instead, so a
+    failed run never leaves truncated output that looks complete.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.f = open(self.tmp_path, "w", encoding="utf-8")
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        self._finish()
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.f.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class SrtWriter(_StagedOutput):
+    """Incremental SRT output: lines are buffered and formatted in blocks of flush_lines."""
+
+    def __init__(self, srt_path, flush_lines=FLUSH_LINES):
+        super().__init__(srt_path)
+        self.flush_lines = flush_lines
+        self.pending = []
+        self.count = 0
+
+    def write(self, start_ms, end_ms, text):
+        self.pending.append((start_ms, end_ms, text))
+        if len(self.pending) >= self.flush_lines:
+            self.flush()
+
+    def flush(self):
+        self.f.write(format_srt(self.pending, first_index=self.count + 1))
+        self.count += len(self.pending)
+        self.pending = []
+
+    def _finish(self):
+        self.flush()
+
+class JsonArrayWriter(_StagedOutput):
+    """Writes a JSON array one item at a time, byte-identical to json.dump(items, f, indent=4)."""
+
+    def __init__(self, json_path):
+        super().__init__(json_path)
+        self.count = 0
+
+    def write(self, item):
+        self.f.write("[\n    " if self.count == 0 else ",\n    ")
+        self.f.write(json.dumps(item, indent=4).replace("\n", "\n    "))
+        self.count += 1
+
+    def _finish(self):
+        self.f.write("\n]" if self.count else "[]")
+
+# ----------------- BENCHMARK -----------------
+def _group_words_loop(words, max_chunk_ms, max_chars):
+    """The original per-word grouping loop, kept for the benchmark and equivalence check."""
+    chunks = []
+    cur_words, cur_start, cur_end, cur_chars = [], None, None, 0
+    for w in words:
+        text = w.get("text") or ""
+        try:
+            start = int(float(w.get("start")))
+            end = int(float(w.get("end")))
+        except Exception:
+            continue
+        if cur_start is None:
+            cur_start, cur_end, cur_words, cur_chars = start, end, [text], len(text)
+            continue
+        prospective_chars = cur_chars + 1 + len(text)
+        if (end - cur_start > max_chunk_ms) or (prospective_chars > max_chars):
+            chunks.append((cur_start, cur_end, cur_words))
+            cur_words, cur_start, cur_end, cur_chars = [text], start, end, len(text)
+        else:
+            cur_words.append(text)
+            cur_end = end
+            cur_chars = prospective_chars
+    if cur_words:
+        chunks.append((cur_start, cur_end, cur_words))
+    return chunks
+
+def _format_srt_loop(lines):
+    """The original line-by-line SRT writer."""
+    def ms_to_srt_time(ms):
+        hours, rem = divmod(int(ms), 3600000)
+        minutes, rem = divmod(rem, 60000)
+        seconds, millis = divmod(rem, 1000)
+        return f"{hours:02}:{minutes:02}:{seconds:02},{millis:03}"
+    out = []
+    for i, (st, en, text) in enumerate(lines, start=1):
+        if en <= st:
+            en = st + 20
+        out.append(f"{i}\n")
+        out.append(f"{ms_to_srt_time(st)} --> {ms_to_srt_time(en)}\n")
+        out.append(text.strip() + "\n\n")
+    return "".join(out)
+
+def _synthetic_words(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 12, size=n)
+    gaps = rng.integers(0, 400, size=n)
+    durations = rng.integers(60, 900, size=n)
+    starts = np.cumsum(gaps + 200)
+    ends = starts + durations            # overlapping, non-monotone ends
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    return [{"text": alphabet[:l] + ("." if l % 5 == 0 else ""), "start": int(s), "end": int(e)}
+            for l, s, e in zip(lengths.tolist(), starts.tolist(), ends.tolist())]
+
+def _edge_case_words():
+    """Hand-written word lists for the cases the synthetic data never produces."""
+    long_word = "incomprehensibilities" * 3                    # longer than MAX_CHARS on its own
+    return {
+        "empty": [],
+        "single word": [{"text": "hi", "start": 0, "end": 100}],
+        "non-monotone ends": [
+            {"text": "a", "start": 0, "end": 3000}, {"text": "b", "start": 100, "end": 500},
+            {"text": "c", "start": 200, "end": 3300}, {"text": "d", "start": 300, "end": 900},
+            {"text": "e", "start": 3100, "end": 3150}, {"text": "f", "start": 3200, "end": 9000},
+            {"text": "g", "start": 3300, "end": 3400},
+        ],
+        "invalid timestamps": [
+            {"text": "ok", "start": 0, "end": 100}, {"text": "none", "start": None, "end": 200},
+            {"text": "missing", "end": 300}, {"text": "garbage", "start": "abc", "end": 400},
+            {"text": "nan", "start": "nan", "end": 500}, {"text": "inf", "start": 600, "end": float("inf")},
+            {"text": "string", "start": "700.9", "end": "800.2"}, {"text": None, "start": 900, "end": 950},
+            {"text": "float", "start": 1000.7, "end": 1200.3},
+        ],
+        "word longer than max_chars": [
+            {"text": long_word, "start": 0, "end": 400}, {"text": "short", "start": 500, "end": 600},
+            {"text": long_word, "start": 700, "end": 900}, {"text": long_word, "start": 1000, "end": 1100},
+            {"text": "end", "start": 1200, "end": 1300},
+        ],
+        "all invalid": [{"text": "x", "start": None, "end": None}, {"text": "y", "start": "?", "end": 1}],
+    }
+
+def check_equivalence(words, max_chunk_ms, max_chars, pad_ms, label=""):
+    """Raise AssertionError unless the NumPy engine matches the original loop on 'words'."""
+    expected = [(s, e + pad_ms, " ".join(ws)) for s, e, ws in _group_words_loop(words, max_chunk_ms, max_chars)]
+    got = [(s, e + pad_ms, " ".join(ws)) for s, e, ws in group_words(words, max_chunk_ms, max_chars)]
+    if got != expected:
+        diff = next((i for i, (a, b) in enumerate(zip(got, expected)) if a != b), min(len(got), len(expected)))
+        raise AssertionError(f"{label}: chunks differ at #{diff} "
+                             f"(numpy {got[diff:diff + 1]}, loop {expected[diff:diff + 1]}, "
+                             f"{len(got)} vs {len(expected)} chunks)")
+    streamed = [(s, e + pad_ms, " ".join(ws)) for s, e, ws in iter_chunks(iter(words), max_chunk_ms, max_chars, 3)]
+    if streamed != expected:
+        raise AssertionError(f"{label}: iter_chunks differs from the loop")
+    if format_srt(got) != _format_srt_loop(expected):
+        raise AssertionError(f"{label}: SRT output differs")
+
+def main():
+    max_chunk_ms, max_chars, pad_ms = 3200, 45, 80
+
+    # Equivalence first: an uncaught AssertionError makes the script exit non-zero
+    for label, words in _edge_case_words().items():
+        check_equivalence(words, max_chunk_ms, max_chars, pad_ms, label)
+    for seed in range(20):
+        words = _synthetic_words(2000, seed)
+        for i in range(seed, len(words), 37):                  # sprinkle invalid timestamps
+            words[i]["start" if i % 2 else "end"] = None if i % 3 else "n/a"
+        check_equivalence(words, max_chunk_ms, max_chars, pad_ms, f"synthetic seed {seed}")
+    print("Equivalence checks passed (edge cases and 20 synthetic transcripts).\n")
+
+    print(f"{'words':>9} {'loop (s)':>10} {'numpy (s)':>10} {'speedup':>8}")
+    for n in (10_000, 100_000, 1_000_000):
+        words = _synthetic_words(n)
+
+        t0 = time.perf_counter()
+        expected = [(s, e + pad_ms, " ".join(ws)) for s, e, ws in _group_words_loop(words, max_chunk_ms, max_chars)]
+        expected_srt = _format_srt_loop(expected)
+        t1 = time.perf_counter()
+        got = [(s, e + pad_ms, " ".join(ws)) for s, e, ws in group_words(words, max_chunk_ms, max_chars)]
+        got_srt = format_srt(got)
+        t2 = time.perf_counter()
+
+        assert got == expected and got_srt == expected_srt, f"{n} words: NumPy output differs from the loop"
+        print(f"{n:>9} {t1 - t0:>10.3f} {t2 - t1:>10.3f} {(t1 - t0) / (t2 - t1):>7.1f}x")
+
+if __name__ == "__main__":
+    main()
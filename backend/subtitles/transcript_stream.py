@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+transcript_stream.py - Incremental parsing of large AssemblyAI transcript JSON
+
+Reads a transcript response as a stream of text chunks and yields only the
+values found at a given path (e.g. every item of "words"), skipping
+everything else (the full "text", utterances, ...) without building it in
+memory. Peak memory is bounded by one read chunk plus the item being decoded.
+
+Run directly for the memory benchmark (Linux/macOS):
+    python transcript_stream.py
+"""
+
+import os
+import re
+import sys
+import json
+import codecs
+import subprocess
+
+READ_CHUNK = 64 * 1024       # bytes read from the response/file at a time
+
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_IN_STRING = re.compile(r'["\\]')
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = ",:]}" + _WHITESPACE
+_decoder = json.JSONDecoder()
+
+class TranscriptStreamError(ValueError):
+    """Raised when the streamed JSON is malformed or ends early."""
+
+# ----------------- INPUT -----------------
+def iter_text(byte_chunks):
+    """Decode an iterable of UTF-8 byte chunks (e.g. Response.iter_content) into text chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def iter_file_text(path, chunk_size=READ_CHUNK):
+    with open(path, "rb") as f:
+        yield from iter_text(iter(lambda: f.read(chunk_size), b""))
+
+# ----------------- PARSER -----------------
+class _Reader:
+    """Buffer over a text-chunk iterator; consumed text is dropped as parsing moves on."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise TranscriptStreamError("Unexpected end of JSON stream")
+
+    def take(self, expected):
+        c = self.peek()
+        if c not in expected:
+            raise TranscriptStreamError(f"Expected one of {expected!r}, found {c!r}")
+        self.pos += 1
+        return c
+
+    def decode(self):
+        """Decode one complete JSON value at the current position."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number cut by a chunk boundary ("12" of "12.5") only counts once a delimiter follows
+                if self.eof or (end < len(self.buf) and self.buf[end] in _DELIMITERS):
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise TranscriptStreamError("Malformed JSON in transcript stream")
+            self.fill()
+
+    def skip(self):
+        """Skip one JSON value without decoding it, keeping only the unread part buffered."""
+        c = self.peek()
+        if c not in '[{"':
+            self.decode()
+            return
+        depth = 0
+        in_string = False
+        pos = self.pos
+        while True:
+            m = (_IN_STRING if in_string else _STRUCTURE).search(self.buf, pos)
+            if m is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise TranscriptStreamError("Unexpected end of JSON stream")
+                pos = self.pos
+                continue
+            ch = m.group()
+            pos = m.end()
+            if in_string:
+                if ch == "\\":
+                    # Skip the escaped character, which may not have arrived yet
+                    while pos >= len(self.buf):
+                        self.pos = pos
+                        if not self.fill():
+                            raise TranscriptStreamError("Unexpected end of JSON stream")
+                        pos = self.pos
+                    pos += 1
+                    continue
+                in_string = False
+                if depth == 0:
+                    break
+            elif ch == '"':
+                in_string = True
+            elif ch in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    break
+        self.pos = pos
+
+def _iter_path(reader, path):
+    if not path:
+        yield reader.decode()
+        return
+    key, rest = path[0], path[1:]
+    c = reader.peek()
+    if key == "*":
+        if c != "[":
+            reader.skip()              # null or another type where a list was expected
+            return
+        reader.pos += 1
+        if reader.peek() == "]":
+            reader.pos += 1
+            return
+        while True:
+            yield from _iter_path(reader, rest)
+            if reader.take(",]") == "]":
+                return
+    else:
+        if c != "{":
+            reader.skip()
+            return
+        reader.pos += 1
+        if reader.peek() == "}":
+            reader.pos += 1
+            return
+        while True:
+            name = reader.decode()
+            reader.take(":")
+            if name == key:
+                yield from _iter_path(reader, rest)
+            else:
+                reader.skip()
+            if reader.take(",}") == "}":
+                return
+
+def iter_items(chunks, path):
+    """
+    Yield every value found at 'path' in the streamed JSON document.
+    Path elements are object keys or "*" for every item of a list, e.g.
+    ("words", "*") or ("utterances", "*", "words", "*").
+    """
+    yield from _iter_path(_Reader(chunks), tuple(path))
+
+def read_fields(chunks, keys):
+    """
+    Read top-level scalar fields of a streamed JSON object, stopping as soon as
+    all of 'keys' are found. Large values in between are skipped, not decoded.
+    """
+    reader = _Reader(chunks)
+    fields = {}
+    reader.take("{")
+    if reader.peek() == "}":
+        return fields
+    while True:
+        name = reader.decode()
+        reader.take(":")
+        if name in keys:
+            fields[name] = reader.decode()
+            if all(k in fields for k in keys):
+                return fields
+        else:
+            reader.skip()
+        if reader.take(",}") == "}":
+            return fields
+
+# ----------------- BENCHMARK -----------------
+def _write_synthetic_transcript(path, n_words):
+    """Write an AssemblyAI-shaped transcript with n_words words without holding it in memory."""
+    vocab = ["now", "about", "the", "girl.", "I", "just", "want", "to", "send", "her", "home,", "very", "good?"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"id": "bench", "status": "completed", "text": "')
+        for i in range(n_words):
+            f.write(vocab[i % len(vocab)] + " ")
+        f.write('", "words": [')
+        t = 0
+        for i in range(n_words):
+            t += 180 + (i * 37) % 300
+            if i:
+                f.write(", ")
+            f.write(json.dumps({"text": vocab[i % len(vocab)], "start": t, "end": t + 150 + (i * 11) % 400,
+                                "confidence": 0.97, "speaker": None}))
+        f.write('], "utterances": null, "error": null}')
+
+def _run_pipeline(mode, path, out_dir):
+    """The subtitle pipeline minus the model and dictionary (constant emotion and definition)."""
+    from subtitle_grouping import group_words, iter_chunks, write_srt, SrtWriter, JsonArrayWriter
+    from emotion_context import iter_classified_chunks
+    srt_path = os.path.join(out_dir, f"bench_{mode}.srt")
+    json_path = os.path.join(out_dir, f"bench_{mode}.json")
+
+    def entry(start, end, text):
+        return {"start": start, "end": end, "text": text, "emotion": "neutral",
+                "definition": "Definition not found.", "example": "Example not found."}
+
+    if mode == "in-memory":
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        words = list(result.get("words") or [])
+        lines, json_data = [], []
+        for start, end, ws in group_words(words, 3200, 45):
+            lines.append((start, end + 80, " ".join(ws)))
+            json_data.extend(entry(start, end + 80, w) for w in ws)
+        write_srt(srt_path, lines)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(json_data, f, indent=4)
+    else:
+        words = iter_items(iter_file_text(path), ("words", "*"))
+        with SrtWriter(srt_path) as srt, JsonArrayWriter(json_path) as out:
+            for (start, end, ws), text, emotion in iter_classified_chunks(iter_chunks(words, 3200, 45), None):
+                srt.write(start, end + 80, text)
+                for w in ws:
+                    out.write(entry(start, end + 80, w))
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        import resource
+        _run_pipeline(sys.argv[2], sys.argv[3], os.path.dirname(sys.argv[3]))
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(peak // 1024 if sys.platform != "darwin" else peak // 1048576)   # MB
+        return
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        print("The memory benchmark needs the 'resource' module (Linux/macOS).")
+        return
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'words':>9} {'JSON (MB)':>10} {'in-memory peak (MB)':>20} {'streaming peak (MB)':>20}  same output")
+        for n in (50_000, 200_000, 800_000):
+            path = os.path.join(tmp, f"transcript_{n}.json")
+            _write_synthetic_transcript(path, n)
+            peaks = {}
+            for mode in ("in-memory", "streaming"):
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", mode, path],
+                                     check=True, capture_output=True, text=True).stdout
+                peaks[mode] = int(out.split()[-1])
+            same = all(open(os.path.join(tmp, f"bench_in-memory.{ext}"), "rb").read() ==
+                       open(os.path.join(tmp, f"bench_streaming.{ext}"), "rb").read() for ext in ("srt", "json"))
+            print(f"{n:>9} {os.path.getsize(path) / 1048576:>10.1f} {peaks['in-memory']:>20} "
+                  f"{peaks['streaming']:>20}  {same}")
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()